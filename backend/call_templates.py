@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+# The shared Vapi client lives in server/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import vapi_client
+
+'''
+Outbound call templates and the Vapi assistants that serve them.
+
+Templates are read from call_templates.json once and re-read only when the
+file's mtime changes; the assistant map is cached the same way. Each template is synced to a persistent Vapi assistant
+whose prompt refers to the customer through {{variables}}; the assistant id
+and a hash of its config are kept in call_template_assistants.json, so an
+assistant is created once, updated only when its template changes, and every
+call sends just the assistantId and the customer's variable values.
+'''
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_PATH = os.environ.get('CALL_TEMPLATES_PATH', os.path.join(BACKEND_DIR, 'call_templates.json'))
+ASSISTANTS_PATH = os.environ.get('CALL_TEMPLATE_ASSISTANTS_PATH', os.path.join(BACKEND_DIR, 'call_template_assistants.json'))
+# Where Vapi sends status updates and end-of-call reports (the server's /callhook)
+WEBHOOK_URL = os.environ.get('CALL_WEBHOOK_URL')
+# Vapi limits assistant names to 40 characters
+ASSISTANT_NAME_MAX = 40
+
+# Filled in per call through assistantOverrides.variableValues
+CUSTOMER_CONTEXT = """
+Customer Information:
+- Name: {{customer_name}}
+- Policy Number: {{policy_number}}
+- Status: {{customer_status}}
+- Email: {{customer_email}}
+
+Additional Notes:
+{{notes}}
+"""
+
+DEFAULT_TEMPLATES = {
+    "claim_follow_up": {
+        "name": "Claim Follow-up",
+        "description": "Follow up with customers regarding their recent claims",
+        "first_message": "Hello, this is Ready Set Insure calling to follow up on your recent claim. Is now a good time to talk?",
+        "system_prompt": "You are a helpful customer service representative from Ready Set Insure. You're calling to follow up on a customer's recent insurance claim. Be empathetic, clear, and concise. Gather any additional information needed for the claim and answer any questions they might have. Remember, you're representing an insurance company, so maintain a professional tone. If the customer has specific questions about coverage amounts or policy details, let them know you'll note their concerns and have a claims specialist contact them with those details."
+    },
+    "policy_renewal": {
+        "name": "Policy Renewal",
+        "description": "Remind customers about upcoming policy renewals",
+        "first_message": "Hello, I'm calling from Ready Set Insure about your insurance policy that's coming up for renewal soon. Do you have a moment to discuss your options?",
+        "system_prompt": "You are a customer service representative from Ready Set Insure. You're calling about the customer's insurance policy that's up for renewal. Your goal is to remind them about the renewal date, briefly discuss any changes to their coverage or premiums, and answer basic questions. If they ask for specific details about new rates or want to make changes to their policy, tell them you'll make a note and have a policy specialist call them back with those specific details. Be friendly but professional, and respect their time."
+    },
+    "feedback_survey": {
+        "name": "Customer Feedback",
+        "description": "Collect feedback on recent customer interactions",
+        "first_message": "Hello, I'm calling from Ready Set Insure. We value your feedback and would appreciate a few minutes of your time to discuss your recent experience with us. Is now a good time?",
+        "system_prompt": "You are a customer service representative from Ready Set Insure conducting a brief satisfaction survey. Ask the customer about their recent experience with the company, whether it was filing a claim, speaking with customer service, or using the website. Your goal is to collect specific feedback on what went well and what could be improved. Keep the conversation relatively short but gather meaningful insights. Thank them for their time and feedback."
+    },
+    "claim_status_update": {
+        "name": "Claim Status Update",
+        "description": "Proactively update customers on their claim status",
+        "first_message": "Hello, I'm calling from Ready Set Insure with an update on your recent insurance claim. Do you have a moment to talk?",
+        "system_prompt": "You are a customer service representative from Ready Set Insure calling to provide an update on a customer's insurance claim. You should inform them about the current status of their claim, any actions that have been taken, and the next steps in the process. Be clear about timeframes. If they have questions about specific details you don't have, offer to have a claims specialist call them back. Be empathetic and understanding, especially if their claim is still being processed or if there are any complications."
+    },
+    "payment_reminder": {
+        "name": "Payment Reminder",
+        "description": "Friendly reminder about upcoming or missed payments",
+        "first_message": "Hello, I'm calling from Ready Set Insure regarding your insurance policy payment. Is this a good time to talk?",
+        "system_prompt": "You are a customer service representative from Ready Set Insure calling about a payment matter. If it's an upcoming payment, your tone should be informative and helpful. If it's a missed payment, be understanding but clear about the importance of maintaining coverage. Avoid using threatening language or creating unnecessary pressure. Your goal is to remind them about the payment, explain payment options if they ask, and address any simple questions they might have. For complex account issues, offer to connect them with the billing department."
+    },
+    "test_call": {
+        "name": "Test Call",
+        "description": "A simple test call with minimal conversation",
+        "first_message": "Hello, this is a test call from Ready Set Insure. How are you today?",
+        "system_prompt": "You are making a quick test call. Keep the conversation very brief, just verify that the connection works, thank them for their time, and end the call."
+    }
+}
+
+
+_templates = None
+_templates_mtime = None
+_templates_lock = threading.Lock()
+_assistants = None
+_assistants_mtime = None
+_assistants_lock = threading.Lock()
+# One lock per template, so a template is synced once while others are served
+_sync_locks = {}
+
+
+def load_templates():
+    """
+    Get the call templates, re-reading the file only if it changed since the
+    last read. The file is created with the default templates if missing.
+
+    Returns:
+        dict: Template key -> template
+    """
+    global _templates, _templates_mtime
+    with _templates_lock:
+        try:
+            mtime = os.stat(TEMPLATES_PATH).st_mtime_ns
+        except FileNotFoundError:
+            with open(TEMPLATES_PATH, 'w') as file:
+                json.dump(DEFAULT_TEMPLATES, file, indent=4)
+            mtime = os.stat(TEMPLATES_PATH).st_mtime_ns
+        if mtime != _templates_mtime:
+            with open(TEMPLATES_PATH, 'r') as file:
+                _templates = json.load(file)
+            _templates_mtime = mtime
+        return _templates
+
+
+def assistant_config(template):
+    """
+    The Vapi assistant for a template, with customer details as variables.
+    """
+    config = {
+        "name": f"RSI {template['name']}"[:ASSISTANT_NAME_MAX],
+        "firstMessage": template["first_message"],
+        "model": {
+            "provider": "openai",
+            "model": "gpt-3.5-turbo",
+            "messages": [
+                {
+                    "role": "system",
+                    "content": template["system_prompt"] + "\n\n" + CUSTOMER_CONTEXT
+                }
+            ]
+        },
+        "voice": "jennifer-playht"
+    }
+    if WEBHOOK_URL:
+        config["server"] = {"url": WEBHOOK_URL}
+    return config
+
+
+def customer_variables(customer, notes=None):
+    """
+    The per-call values for the assistant's {{variables}}.
+    """
+    return {
+        "customer_name": customer.get('name', 'Unknown'),
+        "policy_number": customer.get('policy_number', 'Unknown'),
+        "customer_status": customer.get('status', 'Unknown'),
+        "customer_email": customer.get('email', 'Unknown'),
+        "notes": notes or "None",
+    }
+
+
+def _load_assistants():
+    """
+    The template -> assistant map, re-read only when its file's mtime changes.
+    Call with _assistants_lock held.
+    """
+    global _assistants, _assistants_mtime
+    try:
+        mtime = os.stat(ASSISTANTS_PATH).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if _assistants is None or mtime != _assistants_mtime:
+        if mtime is None:
+            _assistants = {}
+        else:
+            with open(ASSISTANTS_PATH, 'r') as file:
+                _assistants = json.load(file)
+        _assistants_mtime = mtime
+    return _assistants
+
+
+def _synced_assistant(template_key, config_hash):
+    with _assistants_lock:
+        synced = _load_assistants().get(template_key) or {}
+        if synced.get('assistantId') and synced.get('hash') == config_hash:
+            return synced['assistantId'], synced
+        return None, synced
+
+
+def _save_assistant(template_key, assistant):
+    global _assistants_mtime
+    with _assistants_lock:
+        assistants = _load_assistants()
+        assistants[template_key] = assistant
+        with open(ASSISTANTS_PATH, 'w') as file:
+            json.dump(assistants, file, indent=4)
+        _assistants_mtime = os.stat(ASSISTANTS_PATH).st_mtime_ns
+
+
+def assistant_id(template_key):
+    """
+    Get the Vapi assistant for a template, creating it on first use and
+    updating it when the template has changed since it was last synced.
+
+    Args:
+        template_key (str): The key of the template in call_templates.json
+
+    Returns:
+        str: The assistantId, or None if the template does not exist or the
+        assistant could not be synced
+    """
+    template = load_templates().get(template_key)
+    if not template:
+        print(f"Error: Template '{template_key}' not found")
+        return None
+
+    config = assistant_config(template)
+    config_hash = hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
+    found, synced = _synced_assistant(template_key, config_hash)
+    if found:
+        return found
+
+    # The Vapi request runs outside _assistants_lock; only callers syncing
+    # this template wait for it, and they find the result once it is saved
+    with _assistants_lock:
+        sync_lock = _sync_locks.setdefault(template_key, threading.Lock())
+    with sync_lock:
+        found, synced = _synced_assistant(template_key, config_hash)
+        if found:
+            return found
+
+        if synced.get('assistantId'):
+            response = vapi_client.patch(f"/assistant/{synced['assistantId']}", endpoint='assistant', json=config)
+            action = 'update'
+        else:
+            response = vapi_client.post('/assistant', endpoint='assistant', json=config)
+            action = 'create'
+        if response.status_code not in (200, 201):
+            print(f"Failed to {action} assistant for template '{template_key}':")
+            print(response.text)
+            return None
+
+        assistant = {"assistantId": response.json()['id'], "hash": config_hash}
+        _save_assistant(template_key, assistant)
+        print(f"Synced assistant for template '{template_key}' ({action}d)")
+        return assistant['assistantId']
+
+
+def sync_assistants():
+    """
+    Sync every template to its assistant.
+
+    Returns:
+        dict: Template key -> assistantId (None where the sync failed)
+    """
+    return {key: assistant_id(key) for key in load_templates()}
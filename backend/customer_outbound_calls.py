@@ -1,11 +1,19 @@
-import requests
 import json
 import os
 import argparse
 import sys
 from dotenv import load_dotenv
+from pymongo import MongoClient
 from datetime import datetime
 import time
+from itertools import islice
+# The shared Vapi client lives in server/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import vapi_client
+import vapi_async
+import outbound_campaign
+import call_templates
+import call_monitor
 
 # Load environment variables
 load_dotenv()
@@ -20,91 +28,45 @@ if not auth_token:
     print("WARNING: VITE_VAPI_API_KEY environment variable not set.")
     print("Please set this in your .env file or export it as an environment variable.")
     auth_token = input("Enter your Vapi API key to continue: ").strip()
+    vapi_client.set_api_key(auth_token)
 
 if not phone_number_id:
     print("WARNING: TWILIO_PHONE_ID environment variable not set.")
     print("Please set this in your .env file or export it as an environment variable.")
     phone_number_id = input("Enter your Phone Number ID to continue: ").strip()
 
-# MongoDB connection - Using Flask app's connection (optional)
-mongo = None
-try:
-    from app import mongo
-    print("Successfully connected to MongoDB via Flask app")
-except ImportError:
-    print("Warning: Could not import MongoDB connection from Flask app.")
+# MongoDB connection (optional), from the same `uri` setting as the server
+db = None
+mongo_uri = os.environ.get('MONGO_URI') or os.environ.get('uri')
+if mongo_uri:
+    try:
+        mongo_client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
+        mongo_client.admin.command('ping')
+        db = mongo_client.get_default_database(default=os.environ.get('MONGO_DB', 'readysetinsure'))
+        print("Successfully connected to MongoDB")
+    except Exception as e:
+        print(f"Warning: Could not connect to MongoDB: {str(e)}")
+        print("Script will continue but won't be able to update database records.")
+else:
+    print("Warning: MONGO_URI (or uri) environment variable not set.")
     print("Script will continue but won't be able to update database records.")
 
-# Set up headers for API requests
-headers = {
-    'Authorization': f'Bearer {auth_token}',
-    'Content-Type': 'application/json',
-}
-
 def load_call_templates():
     """
-    Load call templates from a JSON file.
+    Load call templates, re-reading call_templates.json only when it changes.
     """
-    try:
-        with open('call_templates.json', 'r') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        # Create default templates if file doesn't exist
-        default_templates = {
-            "claim_follow_up": {
-                "name": "Claim Follow-up",
-                "description": "Follow up with customers regarding their recent claims",
-                "first_message": "Hello, this is Ready Set Insure calling to follow up on your recent claim. Is now a good time to talk?",
-                "system_prompt": "You are a helpful customer service representative from Ready Set Insure. You're calling to follow up on a customer's recent insurance claim. Be empathetic, clear, and concise. Gather any additional information needed for the claim and answer any questions they might have. Remember, you're representing an insurance company, so maintain a professional tone. If the customer has specific questions about coverage amounts or policy details, let them know you'll note their concerns and have a claims specialist contact them with those details."
-            },
-            "policy_renewal": {
-                "name": "Policy Renewal",
-                "description": "Remind customers about upcoming policy renewals",
-                "first_message": "Hello, I'm calling from Ready Set Insure about your insurance policy that's coming up for renewal soon. Do you have a moment to discuss your options?",
-                "system_prompt": "You are a customer service representative from Ready Set Insure. You're calling about the customer's insurance policy that's up for renewal. Your goal is to remind them about the renewal date, briefly discuss any changes to their coverage or premiums, and answer basic questions. If they ask for specific details about new rates or want to make changes to their policy, tell them you'll make a note and have a policy specialist call them back with those specific details. Be friendly but professional, and respect their time."
-            },
-            "feedback_survey": {
-                "name": "Customer Feedback",
-                "description": "Collect feedback on recent customer interactions",
-                "first_message": "Hello, I'm calling from Ready Set Insure. We value your feedback and would appreciate a few minutes of your time to discuss your recent experience with us. Is now a good time?",
-                "system_prompt": "You are a customer service representative from Ready Set Insure conducting a brief satisfaction survey. Ask the customer about their recent experience with the company, whether it was filing a claim, speaking with customer service, or using the website. Your goal is to collect specific feedback on what went well and what could be improved. Keep the conversation relatively short but gather meaningful insights. Thank them for their time and feedback."
-            },
-            "claim_status_update": {
-                "name": "Claim Status Update",
-                "description": "Proactively update customers on their claim status",
-                "first_message": "Hello, I'm calling from Ready Set Insure with an update on your recent insurance claim. Do you have a moment to talk?",
-                "system_prompt": "You are a customer service representative from Ready Set Insure calling to provide an update on a customer's insurance claim. You should inform them about the current status of their claim, any actions that have been taken, and the next steps in the process. Be clear about timeframes. If they have questions about specific details you don't have, offer to have a claims specialist call them back. Be empathetic and understanding, especially if their claim is still being processed or if there are any complications."
-            },
-            "payment_reminder": {
-                "name": "Payment Reminder",
-                "description": "Friendly reminder about upcoming or missed payments",
-                "first_message": "Hello, I'm calling from Ready Set Insure regarding your insurance policy payment. Is this a good time to talk?",
-                "system_prompt": "You are a customer service representative from Ready Set Insure calling about a payment matter. If it's an upcoming payment, your tone should be informative and helpful. If it's a missed payment, be understanding but clear about the importance of maintaining coverage. Avoid using threatening language or creating unnecessary pressure. Your goal is to remind them about the payment, explain payment options if they ask, and address any simple questions they might have. For complex account issues, offer to connect them with the billing department."
-            },
-            "test_call": {
-                "name": "Test Call",
-                "description": "A simple test call with minimal conversation",
-                "first_message": "Hello, this is a test call from Ready Set Insure. How are you today?",
-                "system_prompt": "You are making a quick test call. Keep the conversation very brief, just verify that the connection works, thank them for their time, and end the call."
-            }
-        }
-        
-        # Save default templates to file
-        with open('call_templates.json', 'w') as file:
-            json.dump(default_templates, file, indent=4)
-        
-        return default_templates
+    return call_templates.load_templates()
 
 def get_customer_by_policy(policy_number):
     """
     Retrieve customer information from MongoDB based on policy number.
     """
-    if not mongo:
+    if db is None:
         print("MongoDB connection not available")
         return None
     
     try:
-        customer = mongo.db.clients.find_one({"policy_number": policy_number})
+        customer = db.clients.find_one({"policy_number": policy_number})
         if customer:
             # Convert MongoDB ObjectId to string
             customer["_id"] = str(customer["_id"])
@@ -128,47 +90,21 @@ def make_outbound_call(customer, template_key, notes=None):
     Returns:
     - call_id: ID of the created call, or None if failed
     """
-    # Load call templates
-    templates = load_call_templates()
-    
-    # Check if template exists
-    if template_key not in templates:
+    # Templates are cached and each one has a persistent assistant
+    template = load_call_templates().get(template_key)
+    if not template:
         print(f"Error: Template '{template_key}' not found")
         return None
     
-    template = templates[template_key]
-    
-    # Prepare customer context for the system prompt
-    customer_context = f"""
-Customer Information:
-- Name: {customer.get('name', 'Unknown')}
-- Policy Number: {customer.get('policy_number', 'Unknown')}
-- Status: {customer.get('status', 'Unknown')}
-- Email: {customer.get('email', 'Unknown')}
-"""
-    
-    # Add notes to system prompt if provided
-    if notes:
-        customer_context += f"\nAdditional Notes:\n{notes}\n"
-    
-    # Build the full system prompt
-    system_prompt = template["system_prompt"] + "\n\n" + customer_context
+    assistant_id = call_templates.assistant_id(template_key)
+    if not assistant_id:
+        return None
     
-    # Create the data payload for the API request
+    # Only the customer's details are sent with each call
     data = {
-        'assistant': {
-            "firstMessage": template["first_message"],
-            "model": {
-                "provider": "openai",
-                "model": "gpt-3.5-turbo",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    }
-                ]
-            },
-            "voice": "jennifer-playht"
+        'assistantId': assistant_id,
+        'assistantOverrides': {
+            'variableValues': call_templates.customer_variables(customer, notes)
         },
         'phoneNumberId': phone_number_id,
         'customer': {
@@ -181,8 +117,7 @@ Customer Information:
     
     try:
         # Make the POST request to Vapi to create the phone call
-        response = requests.post(
-            'https://api.vapi.ai/call/phone', headers=headers, json=data)
+        response = vapi_client.post('/call/phone', endpoint='call.create', json=data)
         
         # Check if the request was successful
         if response.status_code == 201:
@@ -191,7 +126,7 @@ Customer Information:
             print(f'Call created successfully with ID: {call_id}')
             
             # Update database with call record if MongoDB is available
-            if mongo:
+            if db is not None:
                 call_record = {
                     "call_id": call_id,
                     "policy_number": customer.get('policy_number'),
@@ -201,7 +136,7 @@ Customer Information:
                     "notes": notes
                 }
                 
-                mongo.db.call_records.insert_one(call_record)
+                db.call_records.insert_one(call_record)
                 print("Call record added to database")
             
             return call_id
@@ -224,7 +159,7 @@ def check_call_status(call_id):
     - status: The current status of the call
     """
     try:
-        response = requests.get(f'https://api.vapi.ai/call/{call_id}', headers=headers)
+        response = vapi_client.get(f'/call/{call_id}', endpoint='call.get')
         
         if response.status_code == 200:
             call_data = response.json()
@@ -232,8 +167,8 @@ def check_call_status(call_id):
             print(f"Call {call_id} status: {status}")
             
             # Update database with status if MongoDB is available
-            if mongo:
-                mongo.db.call_records.update_one(
+            if db is not None:
+                db.call_records.update_one(
                     {"call_id": call_id},
                     {"$set": {"status": status, "last_checked": datetime.now().isoformat()}}
                 )
@@ -246,6 +181,137 @@ def check_call_status(call_id):
         print(f"Error checking call status: {str(e)}")
         return None
 
+def check_call_statuses(call_ids):
+    """
+    Check the status of many calls concurrently.
+    
+    Parameters:
+    - call_ids: The IDs of the calls to check
+    
+    Returns:
+    - statuses: Dict of call ID to status (None if it could not be retrieved)
+    """
+    statuses = vapi_async.refresh_statuses(call_ids, db=db)
+    for call_id, status in statuses.items():
+        print(f"Call {call_id} status: {status}")
+    return statuses
+
+def monitor_calls(call_ids):
+    """
+    Track calls until they end, polling each one as often as its status needs.
+    Calls report by webhook when CALL_WEBHOOK_URL is set, and are then read
+    from the database instead of polled.
+    
+    Parameters:
+    - call_ids: The IDs of the calls to monitor
+    
+    Returns:
+    - statuses: Dict of call ID to final status (None if unknown)
+    """
+    print(f"\nMonitoring {len(call_ids)} call(s). Press Ctrl+C to exit.")
+    final = call_monitor.monitor_calls(
+        call_ids,
+        db=db,
+        webhook=bool(call_templates.WEBHOOK_URL)
+    )
+    for call_id, status in final.items():
+        print(f"Call {call_id} ended with status: {status}")
+    return final
+
+# Fields not needed to place a call
+CAMPAIGN_PROJECTION = {"password": 0, "chatlog": 0, "summary": 0}
+# Policy numbers read and looked up per query in file campaigns
+POLICY_BATCH = 500
+
+def read_policy_numbers(path):
+    """
+    Stream policy numbers from a file, one per line. Blank lines and lines
+    starting with # are skipped.
+    """
+    with open(path, 'r') as file:
+        for line in file:
+            if line.strip() and not line.startswith('#'):
+                yield line.strip()
+
+def count_policy_numbers(path):
+    """
+    Count the policy numbers in a file without keeping them, for progress.
+    """
+    return sum(1 for _ in read_policy_numbers(path))
+
+def customers_for_policies(policy_numbers):
+    """
+    Look up customers in batches of POLICY_BATCH, yielding them in file
+    order. Policy numbers with no customer are yielded as
+    {"policy_number": ...} so they are reported as failures.
+    """
+    policy_numbers = iter(policy_numbers)
+    while True:
+        chunk = list(islice(policy_numbers, POLICY_BATCH))
+        if not chunk:
+            return
+        found = {
+            customer["policy_number"]: customer
+            for customer in db.clients.find({"policy_number": {"$in": chunk}}, CAMPAIGN_PROJECTION)
+        }
+        for policy_number in chunk:
+            yield found.get(policy_number) or {"policy_number": policy_number}
+
+def run_campaign(template_key, policy_file=None, query=None, notes=None,
+                 concurrency=outbound_campaign.DEFAULT_CONCURRENCY,
+                 rate=outbound_campaign.DEFAULT_RATE, burst=None):
+    """
+    Call every customer in a policy number file or matching a Mongo query.
+    
+    Parameters:
+    - template_key: The call template to use for every call
+    - policy_file: File with one policy number per line
+    - query: Mongo filter on the clients collection (used when no file is given)
+    - notes: Additional notes for every call
+    - concurrency: Maximum calls being dispatched at once
+    - rate: Sustained calls per second
+    - burst: Calls allowed back to back before the rate applies
+    
+    Returns:
+    - stats: outbound_campaign.CampaignStats, or None if the campaign could not start
+    """
+    if db is None:
+        print("MongoDB connection not available; campaigns need the clients collection")
+        return None
+    
+    # Sync the template's assistant once before dialing
+    if not call_templates.assistant_id(template_key):
+        return None
+    
+    if policy_file:
+        customers = customers_for_policies(read_policy_numbers(policy_file))
+        total = count_policy_numbers(policy_file)
+    else:
+        customers = db.clients.find(query, CAMPAIGN_PROJECTION)
+        total = db.clients.count_documents(query)
+    
+    def dial(customer):
+        if not customer.get('phone'):
+            print(f"Skipping {customer.get('policy_number')}: no customer or phone number on file")
+            return None
+        return make_outbound_call(customer, template_key, notes)
+    
+    print(f"Starting campaign '{template_key}' for {total} customers "
+          f"({concurrency} concurrent, {rate} calls/s)")
+    stats = outbound_campaign.run_campaign(
+        customers, dial,
+        key=lambda customer: customer.get('policy_number'),
+        total=total, concurrency=concurrency, rate=rate, burst=burst
+    )
+    
+    elapsed = time.monotonic() - stats.started
+    print(f"\nCampaign finished in {round(elapsed)}s: {stats.placed} calls placed, {len(stats.failed)} failed")
+    if stats.failed:
+        print("Failed policy numbers:")
+        for policy_number in stats.failed:
+            print(f"  {policy_number}")
+    return stats
+
 def list_available_templates():
     """
     List all available call templates.
@@ -311,17 +377,7 @@ def test_mode():
         return
     
     # Monitor call status
-    print("\nMonitoring call status. Press Ctrl+C to exit.")
-    try:
-        while True:
-            status = check_call_status(call_id)
-            if status in ['completed', 'failed', 'canceled']:
-                print(f"Call ended with status: {status}")
-                break
-            
-            time.sleep(10)  # Check every 10 seconds
-    except KeyboardInterrupt:
-        print("\nStopped monitoring call status.")
+    monitor_calls([call_id])
 
 def interactive_mode():
     """
@@ -388,17 +444,7 @@ def interactive_mode():
         return
     
     # Monitor call status
-    print("\nMonitoring call status. Press Ctrl+C to exit.")
-    try:
-        while True:
-            status = check_call_status(call_id)
-            if status in ['completed', 'failed', 'canceled']:
-                print(f"Call ended with status: {status}")
-                break
-            
-            time.sleep(10)  # Check every 10 seconds
-    except KeyboardInterrupt:
-        print("\nStopped monitoring call status.")
+    monitor_calls([call_id])
 
 def main():
     """
@@ -406,6 +452,7 @@ def main():
     """
     parser = argparse.ArgumentParser(description='Ready Set Insure - Outbound Call System')
     parser.add_argument('--list-templates', action='store_true', help='List all available call templates')
+    parser.add_argument('--sync-assistants', action='store_true', help='Create or update the Vapi assistant for every template')
     parser.add_argument('--policy', type=str, help='Customer policy number')
     parser.add_argument('--template', type=str, help='Template key to use for the call')
     parser.add_argument('--notes', type=str, help='Additional notes for the call')
@@ -413,12 +460,39 @@ def main():
     parser.add_argument('--test', action='store_true', help='Run in test mode with custom customer data')
     parser.add_argument('--phone', type=str, help='Phone number for test mode (with country code, e.g., +11234567890)')
     parser.add_argument('--name', type=str, help='Customer name for test mode')
+    parser.add_argument('--check-status', type=str, nargs='+', metavar='CALL_ID', help='Check the status of one or more calls')
+    parser.add_argument('--campaign', type=str, metavar='FILE', help='Call every policy number in FILE (one per line) using --template')
+    parser.add_argument('--campaign-query', type=str, metavar='JSON', help='Call every client matching this Mongo filter using --template')
+    parser.add_argument('--concurrency', type=int, default=outbound_campaign.DEFAULT_CONCURRENCY, help='Campaign: maximum calls dispatched at once')
+    parser.add_argument('--rate', type=float, default=outbound_campaign.DEFAULT_RATE, help='Campaign: calls per second')
+    parser.add_argument('--burst', type=int, help='Campaign: calls allowed back to back before --rate applies')
+    parser.add_argument('--monitor', type=str, nargs='*', metavar='CALL_ID', help='Monitor calls until they end; with --campaign, monitor the calls it places')
     
     args = parser.parse_args()
     
     # Handle arguments
     if args.list_templates:
         list_available_templates()
+    elif args.sync_assistants:
+        for template_key, assistant_id in call_templates.sync_assistants().items():
+            print(f"{template_key}: {assistant_id or 'sync failed'}")
+    elif args.check_status:
+        check_call_statuses(args.check_status)
+    elif args.campaign or args.campaign_query:
+        if not args.template:
+            print("--template is required for a campaign")
+            return
+        try:
+            query = json.loads(args.campaign_query) if args.campaign_query else None
+        except json.JSONDecodeError as e:
+            print(f"Invalid --campaign-query: {str(e)}")
+            return
+        stats = run_campaign(args.template, args.campaign, query, args.notes,
+                             args.concurrency, args.rate, args.burst)
+        if stats and stats.call_ids and args.monitor is not None:
+            monitor_calls(stats.call_ids)
+    elif args.monitor:
+        monitor_calls(args.monitor)
     elif args.test:
         if args.phone and args.name and args.template:
             # Create test customer
@@ -434,17 +508,7 @@ def main():
             call_id = make_outbound_call(test_customer, args.template, args.notes)
             
             if call_id:
-                # Monitor call status
-                try:
-                    while True:
-                        status = check_call_status(call_id)
-                        if status in ['completed', 'failed', 'canceled']:
-                            print(f"Call ended with status: {status}")
-                            break
-                        
-                        time.sleep(10)  # Check every 10 seconds
-                except KeyboardInterrupt:
-                    print("\nStopped monitoring call status.")
+                monitor_calls([call_id])
             
         else:
             test_mode()
@@ -1,8 +1,11 @@
 import os
-import requests
+import sys
 from dotenv import load_dotenv
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+# The shared Vapi client lives in server/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import vapi_client
 
 load_dotenv()
 
@@ -10,11 +13,7 @@ app = Flask(__name__)
 CORS(app)
 
 def fetch_call_details(call_id):
-    url = f"https://api.vapi.ai/call/{call_id}"
-    headers = {
-        "Authorization": f"Bearer {os.getenv('VAPI_API_KEY')}"
-    }
-    response = requests.get(url, headers=headers)
+    response = vapi_client.get(f"/call/{call_id}", endpoint='call.get')
     return response.json()
 
 @app.route("/call-details", methods=["GET"])
@@ -0,0 +1,126 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+'''
+Concurrent, rate-limited dispatch for outbound call campaigns.
+
+Calls are placed from a thread pool with at most `concurrency` dispatches in
+flight, and a token bucket keeps the sustained call rate at `rate` calls per
+second (with bursts of up to `burst`), so a campaign stays inside the Vapi
+concurrency limit and the Twilio calls-per-second limit. Items are pulled
+from the iterable as slots free up, so a campaign over a large Mongo cursor
+never loads every customer at once.
+'''
+
+DEFAULT_CONCURRENCY = 10
+DEFAULT_RATE = 1.0
+PROGRESS_INTERVAL = 5
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available, then take it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CampaignStats:
+    def __init__(self, total=None):
+        self.total = total
+        self.dispatched = 0
+        self.placed = 0
+        self.failed = []
+        self.call_ids = []
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, key, call_id):
+        with self.lock:
+            if call_id:
+                self.placed += 1
+                self.call_ids.append(call_id)
+            else:
+                self.failed.append(key)
+
+    def line(self):
+        with self.lock:
+            done = self.placed + len(self.failed)
+            elapsed = time.monotonic() - self.started
+            rate = done / elapsed if elapsed else 0
+            total = f"/{self.total}" if self.total is not None else ""
+            eta = ""
+            if self.total and rate:
+                eta = f", ETA {round((self.total - done) / rate)}s"
+            return (f"[campaign] {done}{total} done: {self.placed} placed, {len(self.failed)} failed, "
+                    f"{self.dispatched - done} in flight, {rate * 60:.1f} calls/min{eta}")
+
+
+def run_campaign(items, dial, key=None, total=None, concurrency=DEFAULT_CONCURRENCY,
+                 rate=DEFAULT_RATE, burst=None, progress_interval=PROGRESS_INTERVAL):
+    """
+    Place a call for every item.
+
+    Args:
+        items: Iterable of customers (or anything `dial` accepts)
+        dial (callable): Places one call and returns the call id, or None on failure
+        key (callable, optional): Identifies an item in the failure list
+        total (int, optional): Number of items, for progress and ETA
+        concurrency (int): Maximum dispatches in flight
+        rate (float): Sustained calls per second
+        burst (int, optional): Token bucket size, defaults to 1 (no bursts)
+        progress_interval (float): Seconds between progress lines
+
+    Returns:
+        CampaignStats: Counts, placed call ids, failed item keys and start time
+    """
+    key = key or (lambda item: item)
+    stats = CampaignStats(total)
+    bucket = TokenBucket(rate, burst or 1)
+    slots = threading.BoundedSemaphore(concurrency)
+    finished = threading.Event()
+
+    def place(item):
+        try:
+            call_id = dial(item)
+        except Exception as e:
+            print(f"Error calling {key(item)}: {str(e)}")
+            call_id = None
+        stats.record(key(item), call_id)
+        slots.release()
+
+    def report():
+        while not finished.wait(progress_interval):
+            print(stats.line(), flush=True)
+
+    reporter = threading.Thread(target=report, daemon=True)
+    reporter.start()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for item in items:
+                slots.acquire()
+                bucket.acquire()
+                with stats.lock:
+                    stats.dispatched += 1
+                pool.submit(place, item)
+    finally:
+        finished.set()
+    print(stats.line(), flush=True)
+    return stats
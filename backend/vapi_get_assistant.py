@@ -1,14 +1,11 @@
-import requests
 import os
+import sys
 from dotenv import load_dotenv
+# The shared Vapi client lives in server/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import vapi_client
 
 load_dotenv()
-# Your Vapi API Authorization token
-auth_token = os.environ['VITE_VAPI_API_KEY']
-headers = {
-    'Authorization': f'Bearer {auth_token}',
-    'Content-Type': 'application/json',
-}
 
 # Create the data payload for the API request
 data = {
@@ -29,8 +26,7 @@ data = {
 }
 
 # Make the POST request to Vapi to create the phone call
-response = requests.get(
-    f'https://api.vapi.ai/assistant/{os.environ['VITE_ASSISTANT_ID']}', headers=headers, json=data)
+response = vapi_client.get(f"/assistant/{os.environ['VITE_ASSISTANT_ID']}", endpoint='assistant')
 
 if response.status_code == 200:
     print('assistant retrieved successfully')
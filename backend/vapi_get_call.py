@@ -1,68 +1,17 @@
-import requests
 import os
-import re
-import json
+import sys
 from dotenv import load_dotenv
 from datetime import datetime
+# The shared Vapi client and policy number extractor live in server/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import vapi_client
+from policy_extract import extract_policy_number
+import transcript_archive
 
 load_dotenv()
-# Your Vapi API Authorization token
-auth_token = os.environ['VITE_VAPI_API_KEY']
 # The Phone Number ID
 phone_number_id = os.environ['TWILIO_PHONE_ID']
 
-headers = {
-    'Authorization': f'Bearer {auth_token}',
-    'Content-Type': 'application/json',
-}
-
-def extract_policy_number(call_data):
-    """
-    Extract the insurance policy number from the call data.
-    This function checks multiple possible locations where the policy number might be stored.
-    """
-    # Method 1: Check in the structured data analysis if available
-    if 'analysis' in call_data and 'structuredData' in call_data['analysis']:
-        policy_number = call_data['analysis']['structuredData'].get('policy_number')
-        if policy_number:
-            return policy_number
-    
-    # Method 2: Check in tool calls if available
-    if 'messages' in call_data:
-        for message in call_data['messages']:
-            if message.get('role') == 'tool_calls' and 'toolCalls' in message:
-                for tool_call in message['toolCalls']:
-                    if tool_call.get('type') == 'function' and tool_call['function'].get('name') == 'confirmUser':
-                        # Extract policy number from arguments (assuming it's JSON)
-                        import json
-                        try:
-                            args = json.loads(tool_call['function']['arguments'])
-                            if 'policy_number' in args:
-                                return args['policy_number']
-                        except:
-                            pass
-    
-    # Method 3: Parse from transcript as fallback
-    if 'transcript' in call_data:
-        # Looking for patterns like "Insurance number is 1 2 3 4 5 6 7 8"
-        patterns = [
-            r"Insurance number is\s+([0-9\s]+)",
-            r"policy number is\s+([0-9\s]+)",
-            r"policy number\s+([0-9\s]+)",
-            r"insurance number\s+([0-9\s]+)",
-            r"my number is\s+([0-9\s]+)",
-            r"my policy is\s+([0-9\s]+)"
-        ]
-        
-        for pattern in patterns:
-            matches = re.search(pattern, call_data['transcript'], re.IGNORECASE)
-            if matches:
-                # Remove spaces and return the number
-                return matches.group(1).replace(" ", "")
-    
-    # If no policy number found
-    return "Unknown"
-
 def get_conversation_transcript(call_data):
     """
     Extract the full conversation transcript from the call data.
@@ -76,7 +25,7 @@ def get_last_call():
     Retrieve the most recent call from the Vapi API.
     """
     # Make the GET request to Vapi to retrieve the latest call
-    response = requests.get('https://api.vapi.ai/call', headers=headers, params={'limit': 1})
+    response = vapi_client.get('/call', endpoint='call.list', params={'limit': 1})
 
     if response.status_code == 200:
         print('Call retrieved successfully')
@@ -116,30 +65,28 @@ def display_last_call_info():
     print("-" * 50)
     
     # Option to save transcript
-    save_option = input("\nWould you like to save this transcript to a file? (y/n): ").strip().lower()
+    save_option = input("\nWould you like to save this transcript to the archive? (y/n): ").strip().lower()
     if save_option == 'y':
-        save_transcript_to_file(transcript, policy_number)
+        save_transcript_to_file(transcript, policy_number, call_data.get('id'))
 
-def save_transcript_to_file(transcript, policy_number):
+def save_transcript_to_file(transcript, policy_number, call_id=None):
     """
-    Save the transcript to a text file.
+    Save the transcript to the transcript archive.
     
     Parameters:
     - transcript (str): The conversation transcript
-    - policy_number (str): The policy number to use in the filename
+    - policy_number (str): The policy number the call belongs to
+    - call_id (str): The Vapi call id; defaults to a timestamp
     """
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"transcript_{policy_number}_{timestamp}.txt"
+    if not call_id:
+        call_id = datetime.now().strftime('%Y%m%d_%H%M%S')
     
     try:
-        with open(filename, 'w') as file:
-            file.write(f"Insurance Policy Number: {policy_number}\n\n")
-            file.write("Conversation Transcript:\n")
-            file.write("-" * 50 + "\n")
-            file.write(transcript)
-            file.write("\n" + "-" * 50)
-        
-        print(f"Transcript saved successfully to {filename}")
+        digest, duplicate = transcript_archive.default_archive().save(policy_number, call_id, transcript)
+        if duplicate:
+            print(f"Transcript already archived ({digest[:12]}), linked to call {call_id}")
+        else:
+            print(f"Transcript archived ({digest[:12]}) in {transcript_archive.ARCHIVE_DIR}")
     except Exception as e:
         print(f"Error saving transcript: {e}")
 
@@ -46,13 +46,15 @@ export default function CustomerPage({ params }: { params: { policyNumber: strin
   const [summary, setSummary] = useState("");
   // const [analysis, setAnalysis] = useState("");
   const [feedback, setFeedback] = useState("");
+  // Idempotency key for the feedback being sent, reused when the same message is retried
+  const feedbackKey = useRef<{ feedback: string, key: string } | null>(null);
   const [chat, setChat] = useState("");
   const [showToast, setShowToast] = useState(false);
   const [toastMessage, setToastMessage] = useState("");
   const [toastType, setToastType] = useState("info"); // info, success, error
   const [isCallingCustomer, setIsCallingCustomer] = useState(false);
   const [currentCallId, setCurrentCallId] = useState<string | null>(null);
-  const [callStatusCheckInterval, setCallStatusCheckInterval] = useState<NodeJS.Timeout | null>(null);
+  const [callStatusSource, setCallStatusSource] = useState<EventSource | null>(null);
   const [analysis, setCall] = useState("")
   // Animation states
   const [displayedSummary, setDisplayedSummary] = useState("");
@@ -105,7 +107,7 @@ export default function CustomerPage({ params }: { params: { policyNumber: strin
     const fetchCustomerData = async () => {
       try {
         setLoading(true);
-        const response = await fetch("http://localhost:5000/confirmUser", {
+        const response = await fetch("http://localhost:5000/confirmUser?fields=detail", {
           method: "POST",
           headers: {
             "Content-Type": "application/json",
@@ -141,8 +143,8 @@ export default function CustomerPage({ params }: { params: { policyNumber: strin
 
     // Cleanup function to clear intervals
     return () => {
-      if (callStatusCheckInterval) {
-        clearInterval(callStatusCheckInterval);
+      if (callStatusSource) {
+        callStatusSource.close();
       }
     };
   }, [params.policyNumber]);
@@ -295,67 +297,116 @@ export default function CustomerPage({ params }: { params: { policyNumber: strin
     }
   };
 
-  // Check call status periodically
-  const checkCallStatus = async (callId: string) => {
-    try {
-      const response = await fetch(`http://localhost:5000/checkCallStatus?call_id=${callId}`, {
-        method: "GET",
-        headers: {
-          "Content-Type": "application/json",
-        },
-      });
+  // Update the UI for a call status pushed by the server
+  const handleCallStatus = (status: string, source: EventSource) => {
+    const statusMap: {[key: string]: string} = {
+      "initiated": "Initiating call...",
+      "ringing": "Calling customer...",
+      "in-progress": "Customer is on the call",
+      "completed": "Call completed successfully",
+      "failed": "Call failed to connect",
+      "canceled": "Call was canceled",
+      "ended": "Call ended"
+    };
+    
+    const statusMessage = statusMap[status] || status;
+    setToastMessage(statusMessage);
+    
+    if (status === "completed" || status === "ended") {
+      setIsCallingCustomer(false);
+      setToastType("success");
+      // Fetch updated call history
+      fetchCallHistory();
+      // Fetch updated call analysis
+      fetchCall();
       
-      if (response.ok) {
-        const data = await response.json();
-        
-        // Update UI based on call status
+      // Stop listening for status events
+      source.close();
+      setCallStatusSource(null);
+      
+      // Show success message for a few seconds
+      setTimeout(() => setShowToast(false), 3000);
+    } else if (status === "failed" || status === "canceled") {
+      setIsCallingCustomer(false);
+      setToastType("error");
+      
+      // Stop listening for status events
+      source.close();
+      setCallStatusSource(null);
+      
+      // Show error message for a few seconds
+      setTimeout(() => setShowToast(false), 5000);
+    }
+  };
+
+  // Subscribe to status events for a call instead of polling
+  const watchCallStatus = (callId: string) => {
+    const source = new EventSource(`http://localhost:5000/calls/${callId}/events`);
+    
+    source.addEventListener("status", (event) => {
+      try {
+        const data = JSON.parse((event as MessageEvent).data);
         if (data.status) {
-          const statusMap: {[key: string]: string} = {
-            "initiated": "Initiating call...",
-            "ringing": "Calling customer...",
-            "in-progress": "Customer is on the call",
-            "completed": "Call completed successfully",
-            "failed": "Call failed to connect",
-            "canceled": "Call was canceled",
-            "ended": "Call ended"
-          };
-          
-          const statusMessage = statusMap[data.status] || data.status;
-          setToastMessage(statusMessage);
-          
-          if (data.status === "completed" || data.status === "ended") {
-            setIsCallingCustomer(false);
-            setToastType("success");
-            // Fetch updated call history
-            fetchCallHistory();
-            // Fetch updated call analysis
-            fetchCall();
-            
-            // Clear interval
-            if (callStatusCheckInterval) {
-              clearInterval(callStatusCheckInterval);
-              setCallStatusCheckInterval(null);
-            }
-            
-            // Show success message for a few seconds
-            setTimeout(() => setShowToast(false), 3000);
-          } else if (data.status === "failed" || data.status === "canceled") {
-            setIsCallingCustomer(false);
-            setToastType("error");
-            
-            // Clear interval
-            if (callStatusCheckInterval) {
-              clearInterval(callStatusCheckInterval);
-              setCallStatusCheckInterval(null);
-            }
-            
-            // Show error message for a few seconds
-            setTimeout(() => setShowToast(false), 5000);
-          }
+          handleCallStatus(data.status, source);
+        }
+      } catch (error) {
+        console.error("Error reading call status event:", error);
+      }
+    });
+    
+    // The call has no record; stop instead of reconnecting
+    source.addEventListener("missing", () => {
+      source.close();
+      setCallStatusSource(null);
+      setIsCallingCustomer(false);
+    });
+    
+    return source;
+  };
+
+  // Wait for a queued feedback call to be placed, then watch its status
+  const watchCallJob = async (jobId: string) => {
+    while (true) {
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+      try {
+        const response = await fetch(`http://localhost:5000/callJobs/${jobId}`);
+        const job = await response.json();
+        if (!response.ok) {
+          throw new Error(job.error || "Failed to check call job");
+        }
+        
+        if (job.call_id) {
+          setCurrentCallId(job.call_id);
+          setCallStatusSource(watchCallStatus(job.call_id));
+          return;
+        }
+        
+        if (job.status === "unknown") {
+          // Vapi may have placed the call; it is not retried
+          setToastMessage("Could not confirm the call was placed, check the call history before calling again");
+          setToastType("error");
+          setShowToast(true);
+          setIsCallingCustomer(false);
+          setTimeout(() => setShowToast(false), 5000);
+          return;
         }
+        
+        if (job.status === "failed" || (job.status === "queued" && job.last_error)) {
+          // Retries are scheduled minutes apart; stop tracking here
+          setToastMessage(job.status === "failed"
+            ? `Error: ${job.last_error || "Failed to initiate call"}`
+            : "Call could not be placed, it will be retried automatically");
+          setToastType(job.status === "failed" ? "error" : "info");
+          setShowToast(true);
+          setIsCallingCustomer(false);
+          setTimeout(() => setShowToast(false), 5000);
+          return;
+        }
+      } catch (error) {
+        console.error("Error checking call job:", error);
+        setIsCallingCustomer(false);
+        return;
       }
-    } catch (error) {
-      console.error("Error checking call status:", error);
     }
   };
 
@@ -379,11 +430,16 @@ export default function CustomerPage({ params }: { params: { policyNumber: strin
       setToastType("info");
       setShowToast(true);
 
+      if (feedbackKey.current?.feedback !== feedback) {
+        feedbackKey.current = { feedback, key: crypto.randomUUID() };
+      }
+
       // Send the feedback to the backend to initiate the outbound call
       const response = await fetch("http://localhost:5000/SendCustomerFeedback", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
+          "Idempotency-Key": feedbackKey.current.key,
         },
         body: JSON.stringify({
           policy_number: params.policyNumber,
@@ -394,13 +450,10 @@ export default function CustomerPage({ params }: { params: { policyNumber: strin
       const data = await response.json();
       
       if (response.ok && data.success) {
-        // Store call ID for status checking
-        setCurrentCallId(data.call_id);
-        
         // Add the feedback to the call history as a system message
         const newSystemMessage = {
           id: `feedback_${Date.now()}`,
-          message: `Initiated call to share feedback: "${feedback}"`,
+          message: `Queued call to share feedback: "${feedback}"`,
           sender: "system",
           timestamp: new Date().toISOString()
         };
@@ -410,14 +463,10 @@ export default function CustomerPage({ params }: { params: { policyNumber: strin
         // Clear the feedback input
         setFeedback("");
         
-        // Set up interval to check call status
-        const interval = setInterval(() => {
-          if (data.call_id) {
-            checkCallStatus(data.call_id);
-          }
-        }, 5000); // Check every 5 seconds
-        
-        setCallStatusCheckInterval(interval);
+        // The call is queued; listen for status updates once it is placed
+        if (data.job_id) {
+          watchCallJob(data.job_id);
+        }
       } else {
         // Show error toast
         setToastMessage(`Error: ${data.error || "Failed to initiate call"}`);
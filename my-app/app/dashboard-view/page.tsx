@@ -28,10 +28,17 @@ import {
   TooltipTrigger,
 } from "@/components/ui/tooltip";
 
+// Clients shown per page in the assistance list
+const CLIENT_PAGE_SIZE = 50;
+
 export default function Dashboard() {
   const [date, setDate] = useState(new Date());
   const [currentMonth, setCurrentMonth] = useState(new Date());
   const [customers, setCustomers] = useState([]);
+  const [nextAfter, setNextAfter] = useState(null); // Cursor for the next page of clients
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [clientStats, setClientStats] = useState({ total: 0, by_status: {} });
+  const [callOutcomes, setCallOutcomes] = useState({});
   const [barChartData, setBarChartData] = useState([]);
   const [dailyCounts, setDailyCounts] = useState({}); // State for daily counts
   const [displayedCustomers, setDisplayedCustomers] = useState([]); // For animation
@@ -41,31 +48,69 @@ export default function Dashboard() {
   // Animation states
   const [panelsAnimated, setPanelsAnimated] = useState(false);
 
+  // Fetch one page of clients; counts come from /dashboard/stats
+  const fetchCustomerPage = async (after = null) => {
+    const params = new URLSearchParams({ fields: "list", limit: String(CLIENT_PAGE_SIZE) });
+    if (after) params.set("after", after);
+    const response = await fetch(`http://localhost:5000/GetAllClients?${params}`);
+    const data = await response.json();
+    if (!response.ok) {
+      throw new Error(data.error || "Failed to fetch customers");
+    }
+    setNextAfter(data.next_after);
+    return data.users;
+  };
+
+  const loadMoreCustomers = async () => {
+    if (!nextAfter || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const users = await fetchCustomerPage(nextAfter);
+      setCustomers(prev => [...prev, ...users]);
+    } catch (error) {
+      console.error("Error fetching customers:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Fetch clients from the backend
   useEffect(() => {
     async function fetchCustomers() {
       try {
-        const response = await fetch("http://localhost:5000/GetAllClients");
+        const users = await fetchCustomerPage();
+        setCustomers(users);
+        
+        // Start animations after data is loaded
+        setTimeout(() => {
+          setPanelsAnimated(true);
+          animateCustomersList(users);
+        }, 100);
+      } catch (error) {
+        console.error("Error fetching customers:", error);
+      }
+    }
+
+    // Fetch chart data aggregated on the server
+    async function fetchStats() {
+      try {
+        const response = await fetch("http://localhost:5000/dashboard/stats");
         const data = await response.json();
         if (response.ok) {
-          setCustomers(data.users);
-          updateBarChartData(data.users);
-          calculateDailyCounts(data.users); // Calculate daily counts for heatmap
-          
-          // Start animations after data is loaded
-          setTimeout(() => {
-            setPanelsAnimated(true);
-            animateCustomersList(data.users);
-          }, 100);
+          setBarChartData(data.clients.by_weekday);
+          setDailyCounts(data.clients.by_date); // Daily counts for heatmap
+          setClientStats(data.clients);
+          setCallOutcomes(data.calls);
         } else {
-          console.error("Failed to fetch customers:", data.error);
+          console.error("Failed to fetch dashboard stats:", data.error);
         }
       } catch (error) {
-        console.error("Error fetching customers:", error);
+        console.error("Error fetching dashboard stats:", error);
       }
     }
 
     fetchCustomers();
+    fetchStats();
     
     // Set up sample appointments for demonstration
     const tomorrow = addDays(new Date(), 1);
@@ -90,30 +135,6 @@ export default function Dashboard() {
     ]);
   }, []);
   
-  // Function to calculate daily counts for the heatmap
-  function calculateDailyCounts(customersData) {
-    const counts = {};
-    
-    customersData.forEach(customer => {
-      if (customer.date) {
-        try {
-          const customerDate = new Date(customer.date);
-          if (isValid(customerDate)) {
-            // Format the date as YYYY-MM-DD for use as a key
-            const dateStr = format(customerDate, 'yyyy-MM-dd');
-            
-            // Increment count for this date
-            counts[dateStr] = (counts[dateStr] || 0) + 1;
-          }
-        } catch (error) {
-          console.error("Invalid date:", customer.date);
-        }
-      }
-    });
-    
-    setDailyCounts(counts);
-  }
-  
   // Function to animate customers list sequentially
   const animateCustomersList = (customersData) => {
     // Start with empty array
@@ -127,23 +148,6 @@ export default function Dashboard() {
     });
   };
 
-  // Update Bar Chart Data
-  function updateBarChartData(customersData) {
-    const daysOfWeek = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"];
-    const newBarChartData = daysOfWeek.map((day) => ({
-      name: day,
-      total: customersData.filter((customer) => {
-        try {
-          const customerDate = new Date(customer.date);
-          return isValid(customerDate) && daysOfWeek[customerDate.getDay()] === day;
-        } catch (error) {
-          return false;
-        }
-      }).length,
-    }));
-    setBarChartData(newBarChartData);
-  }
-
   // Handle navigation to customer detail page
   const navigateToCustomerDetail = (policyNumber) => {
     router.push(`/customer/${policyNumber}`);
@@ -210,10 +214,12 @@ export default function Dashboard() {
            date1.getFullYear() === date2.getFullYear();
   };
 
-  // Group customers by status
-  const incompleteCustomers = customers.filter((c) => c.status === "incomplete");
-  const pendingCustomers = customers.filter((c) => c.status === "pending");
-  const completeCustomers = customers.filter((c) => c.status === "completed" || c.status === "complete");
+  // Client counts by status, across all clients
+  const statusCount = (...statuses) =>
+    statuses.reduce((sum, status) => sum + (clientStats.by_status[status] || 0), 0);
+  const incompleteCount = statusCount("incomplete");
+  const pendingCount = statusCount("pending");
+  const completeCount = statusCount("completed", "complete");
 
   // Custom day renderer for the calendar
   const renderCalendarDay = (day, selectedDay, isOutsideMonth) => {
@@ -284,13 +290,13 @@ export default function Dashboard() {
           <CardHeader>
             <CardTitle>Customer Assistance</CardTitle>
             <CardDescription className="text-red-500">
-              {incompleteCustomers.length} {incompleteCustomers.length === 1 ? "customer" : "customers"} need assistance
+              {incompleteCount} {incompleteCount === 1 ? "customer" : "customers"} need assistance
             </CardDescription>
             <CardDescription className="text-yellow-500">
-              {pendingCustomers.length} {pendingCustomers.length === 1 ? "customer" : "customers"} are receiving assistance
+              {pendingCount} {pendingCount === 1 ? "customer" : "customers"} are receiving assistance
             </CardDescription>
             <CardDescription className="text-green-500">
-              {completeCustomers.length} {completeCustomers.length === 1 ? "customer" : "customers"} completed assistance
+              {completeCount} {completeCount === 1 ? "customer" : "customers"} completed assistance
             </CardDescription>
           </CardHeader>
           <CardContent>
@@ -339,6 +345,16 @@ export default function Dashboard() {
                 </div>
               ))}
             </div>
+            {nextAfter && (
+              <Button
+                variant="outline"
+                className="w-full mt-6"
+                onClick={loadMoreCustomers}
+                disabled={loadingMore}
+              >
+                {loadingMore ? "Loading..." : `Show more (${customers.length} of ${clientStats.total})`}
+              </Button>
+            )}
           </CardContent>
         </Card>
 
@@ -352,7 +368,12 @@ export default function Dashboard() {
               <Users className="h-4 w-4 text-muted-foreground" />
             </CardHeader>
             <CardContent>
-              <div className="text-2xl font-bold">{customers.length}</div>
+              <div className="text-2xl font-bold">{clientStats.total}</div>
+              <p className="text-xs text-muted-foreground">
+                {Object.entries(callOutcomes)
+                  .map(([status, count]) => `${count} ${status}`)
+                  .join(" · ") || "No calls yet"}
+              </p>
             </CardContent>
           </Card>
 
@@ -0,0 +1,91 @@
+import argparse
+import random
+import re
+import timeit
+from policy_extract import extract_policy_number
+
+'''
+Micro-benchmark for policy number extraction.
+
+Builds a corpus of synthetic Vapi calls (long transcripts, policy numbers
+read as digits or words, some with structured data or no number at all),
+checks the shared extractor against the old six-regex version, and times both.
+
+Run:
+python bench_policy_extract.py
+python bench_policy_extract.py --calls 5000 --repeat 5
+'''
+
+WORDS = ['zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine']
+FILLER = [
+    "AI: Thank you for calling Ready, Set, Insure. How can I help you today?",
+    "User: I wanted to ask about my claim from last week.",
+    "AI: Of course. Could you describe the issue you're facing?",
+    "User: The adjuster hasn't called me back yet and I'm getting worried.",
+    "AI: I understand. Let me note that down for the claims team.",
+]
+PHRASES = ["Insurance number is", "policy number is", "my policy is", "my number is"]
+
+
+def legacy_extract_policy_number(call_data):
+    # The transcript fallback as it was before policy_extract
+    patterns = [
+        r"Insurance number is\s+([0-9\s]+)",
+        r"policy number is\s+([0-9\s]+)",
+        r"policy number\s+([0-9\s]+)",
+        r"insurance number\s+([0-9\s]+)",
+        r"my number is\s+([0-9\s]+)",
+        r"my policy is\s+([0-9\s]+)"
+    ]
+    for pattern in patterns:
+        matches = re.search(pattern, call_data['transcript'], re.IGNORECASE)
+        if matches:
+            return matches.group(1).replace(" ", "")
+    return "Unknown"
+
+
+def make_call(rng):
+    policy_number = "".join(rng.choice("0123456789") for _ in range(8))
+    kind = rng.random()
+    lines = [rng.choice(FILLER) for _ in range(rng.randint(20, 60))]
+    spoken = False
+
+    if kind < 0.6:
+        lines.insert(rng.randint(0, len(lines)), f"User: {rng.choice(PHRASES)} {' '.join(policy_number)}.")
+    elif kind < 0.8:
+        spoken = True
+        words = " ".join(WORDS[int(digit)] for digit in policy_number)
+        lines.insert(rng.randint(0, len(lines)), f"User: {rng.choice(PHRASES)} {words}.")
+    else:
+        policy_number = None
+
+    call = {"id": str(rng.random()), "transcript": "\n".join(lines), "messages": [], "analysis": {}}
+    return call, policy_number, spoken
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark policy number extraction')
+    parser.add_argument('--calls', type=int, default=2000, help='Number of synthetic calls')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    corpus = [make_call(rng) for _ in range(args.calls)]
+    calls = [call for call, _, _ in corpus]
+
+    for call, expected, _ in corpus:
+        assert extract_policy_number(call) == (expected or "Unknown"), call['transcript']
+    legacy_found = sum(
+        1 for call, expected, spoken in corpus
+        if expected and not spoken and legacy_extract_policy_number(call) == expected)
+    new_found = sum(1 for call, expected, _ in corpus if expected and extract_policy_number(call) == expected)
+    print(f"Corpus: {len(calls)} calls, {sum(1 for _, e, _ in corpus if e)} with a policy number")
+    print(f"Found: legacy {legacy_found}, shared {new_found}")
+
+    for name, fn in (("legacy", legacy_extract_policy_number), ("shared", extract_policy_number)):
+        best = min(timeit.repeat(lambda: [fn(call) for call in calls], number=1, repeat=args.repeat))
+        print(f"{name}: {best * 1000:.1f}ms total, {best / len(calls) * 1e6:.1f}us per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+'''
+Call status events for Server-Sent Events streams.
+
+The status pipeline (call_ingest, status_refresher) publishes every status
+transition here and each open /calls/<call_id>/events stream receives it
+from its own queue. Streams also re-read call_records on every heartbeat so
+transitions written by another process still reach the browser.
+
+A stream closes after MAX_STREAM_SECONDS even if the call is still open; it
+tells the browser to reconnect after RECONNECT_MS, and EventSource does so
+on its own. A stream for a call with no record sends a `missing` event and
+closes, so the browser can stop reconnecting.
+'''
+
+TERMINAL_STATUSES = ("completed", "failed", "canceled", "ended")
+HEARTBEAT_SECONDS = 15
+MAX_STREAM_SECONDS = 600
+RECONNECT_MS = 3000
+
+_subscribers = {}
+_lock = threading.Lock()
+
+
+def publish(call_id, status):
+    """
+    Send a status transition to every stream watching the call.
+
+    Args:
+        call_id (str): The Vapi call id
+        status (str): The new call status
+    """
+    with _lock:
+        queues = list(_subscribers.get(call_id, ()))
+    for q in queues:
+        q.put(status)
+
+
+def _subscribe(call_id):
+    q = queue.Queue()
+    with _lock:
+        _subscribers.setdefault(call_id, []).append(q)
+    return q
+
+
+def _unsubscribe(call_id, q):
+    with _lock:
+        queues = _subscribers.get(call_id, [])
+        if q in queues:
+            queues.remove(q)
+        if not queues:
+            _subscribers.pop(call_id, None)
+
+
+def _event(status):
+    data = json.dumps({"status": status, "timestamp": datetime.now().isoformat()})
+    return f"event: status\ndata: {data}\n\n"
+
+
+def stream(db, call_id):
+    """
+    Generate an SSE stream of status transitions for one call. The stream
+    starts with the stored status and ends after a terminal status, when the
+    call has no record, or after MAX_STREAM_SECONDS.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        call_id (str): The Vapi call id
+
+    Yields:
+        str: SSE-formatted events and heartbeat comments
+    """
+    def stored_status():
+        record = db.call_records.find_one({"call_id": call_id}, {"_id": 0, "status": 1})
+        return record.get("status") if record else None
+
+    q = _subscribe(call_id)
+    try:
+        deadline = time.monotonic() + MAX_STREAM_SECONDS
+        yield f"retry: {RECONNECT_MS}\n\n"
+        last = stored_status()
+        if not last:
+            yield "event: missing\ndata: {}\n\n"
+            return
+        yield _event(last)
+        while last not in TERMINAL_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # The browser reconnects and gets the stored status again
+                return
+            try:
+                status = q.get(timeout=min(HEARTBEAT_SECONDS, remaining))
+            except queue.Empty:
+                status = stored_status()
+                if not status:
+                    yield "event: missing\ndata: {}\n\n"
+                    return
+                if status == last:
+                    yield ": heartbeat\n\n"
+                    continue
+            if status != last:
+                last = status
+                yield _event(status)
+    finally:
+        _unsubscribe(call_id, q)
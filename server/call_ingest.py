@@ -0,0 +1,113 @@
+import queue
+import threading
+from datetime import datetime
+import call_store
+import call_events
+import call_jobs
+
+'''
+Ingestion of Vapi server messages sent to /callhook.
+
+The webhook only puts the message on an in-process queue and returns; a
+background worker normalizes each message and writes it to the call store
+and call_records, so the data is in Mongo as soon as the call ends.
+'''
+
+# Message types we persist. Anything else is acknowledged and dropped.
+HANDLED_TYPES = ("end-of-call-report", "status-update")
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def enqueue(message):
+    """
+    Queue a Vapi server message for ingestion.
+
+    Args:
+        message (dict): The `message` object of a Vapi server request
+
+    Returns:
+        bool: True if the message type is one we persist
+    """
+    if message.get('type') not in HANDLED_TYPES:
+        return False
+    _queue.put(message)
+    return True
+
+
+def call_from_report(message):
+    """
+    Build a Vapi call object from an end-of-call-report message, filling in
+    the transcript, messages and analysis that the report carries alongside
+    the call.
+    """
+    call_data = dict(message.get('call') or {})
+    artifact = message.get('artifact') or {}
+    analysis = message.get('analysis') or call_data.get('analysis') or {}
+
+    call_data['status'] = 'ended'
+    call_data['analysis'] = analysis
+    for key in ('endedReason', 'startedAt', 'endedAt', 'cost', 'recordingUrl', 'summary'):
+        if message.get(key) is not None:
+            call_data[key] = message[key]
+    call_data['transcript'] = message.get('transcript') or artifact.get('transcript') or call_data.get('transcript')
+    call_data['messages'] = artifact.get('messages') or message.get('messages') or call_data.get('messages')
+    if not call_data.get('updatedAt') and message.get('timestamp'):
+        call_data['updatedAt'] = message['timestamp']
+    return call_data
+
+
+def ingest_message(db, message):
+    """
+    Persist one Vapi server message.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        message (dict): The `message` object of a Vapi server request
+    """
+    call_id = (message.get('call') or {}).get('id')
+    if not call_id:
+        print(f"Ignoring {message.get('type')} message without a call id")
+        return
+
+    if message['type'] == 'end-of-call-report':
+        call = call_from_report(message)
+        call_store.upsert_calls(db, [call])
+        call_jobs.call_ended(db, call_id, call.get('endedReason'))
+        status = 'ended'
+    else:
+        status = message.get('status')
+        call_store.update_status(db, call_id, status)
+
+    db.call_records.update_one(
+        {"call_id": call_id},
+        {"$set": {"status": status, "last_checked": datetime.now().isoformat()}}
+    )
+    call_events.publish(call_id, status)
+
+
+def _run(db):
+    while True:
+        message = _queue.get()
+        try:
+            ingest_message(db, message)
+        except Exception as e:
+            print(f"Error ingesting {message.get('type')} message: {str(e)}")
+        finally:
+            _queue.task_done()
+
+
+def start_worker(db):
+    """
+    Start the background ingestion worker once per process.
+
+    Args:
+        db: The Mongo database (mongo.db)
+    """
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, args=(db,), name="call-ingest", daemon=True)
+            _worker.start()
@@ -0,0 +1,380 @@
+import argparse
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, ReturnDocument
+import idempotency
+
+'''
+Durable queue for outbound call jobs.
+
+Jobs live in the `call_jobs` collection, so they survive restarts and can be
+worked by any number of threads and processes. A worker claims the oldest due
+job with one atomic find_one_and_update that also sets a lease; a job whose
+worker dies is claimed again once its lease expires. Every later write is
+fenced on the claiming worker id, so a worker that lost its lease cannot
+overwrite the new owner's result.
+
+Lifecycle:
+queued -> running -> dialed -> completed
+Failures to place the call, and calls that end unanswered, go back to
+`queued` with exponential backoff until max_attempts, then to `failed`.
+When a handler cannot tell whether Vapi created the call (a read timeout or
+a 5xx after the request was sent) it raises CallOutcomeUnknown and the job
+goes to `unknown` instead of being retried, so the customer is never dialed
+twice. The lease is renewed while the handler runs, and the job is marked
+`dialing_at` before it; a job reclaimed with that mark (its worker died or
+lost the lease mid-dial) also goes to `unknown` instead of dialing again.
+
+Run workers in their own process:
+python call_jobs.py --workers 4
+'''
+
+JOBS_COLLECTION = "call_jobs"
+MAX_ATTEMPTS = int(os.environ.get('CALL_JOB_MAX_ATTEMPTS', 5))
+LEASE_SECONDS = int(os.environ.get('CALL_JOB_LEASE_SECONDS', 120))
+POLL_INTERVAL = 2
+BACKOFF_BASE = 60
+BACKOFF_CAP = 3600
+# Vapi endedReason values that mean the customer was not reached
+NO_ANSWER_REASONS = ("customer-did-not-answer", "customer-busy", "voicemail")
+
+# kind -> handler(db, payload) returning the Vapi call id, or None if the
+# call was definitely not placed
+HANDLERS = {}
+
+_threads = []
+_threads_lock = threading.Lock()
+
+
+class CallOutcomeUnknown(Exception):
+    """
+    The request to create the call may have reached Vapi, so retrying could
+    place a second call.
+    """
+
+
+def ensure_indexes(db):
+    db[JOBS_COLLECTION].create_index(
+        [("status", ASCENDING), ("run_at", ASCENDING)],
+        name="status_run_at"
+    )
+    db[JOBS_COLLECTION].create_index(
+        [("call_id", ASCENDING)],
+        name="call_id",
+        sparse=True
+    )
+
+
+def register(kind, handler):
+    """
+    Register the function that runs jobs of a kind. Workers only claim
+    kinds that have a handler in their process.
+    """
+    HANDLERS[kind] = handler
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def backoff_seconds(attempt):
+    """
+    Delay before retry number `attempt` (1-based): exponential, capped, with
+    full jitter on the upper half so retries from a burst spread out.
+    """
+    delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def enqueue(db, kind, payload, max_attempts=MAX_ATTEMPTS):
+    """
+    Add a job to the queue.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        kind (str): The registered job kind
+        payload (dict): Passed to the handler
+        max_attempts (int): Attempts before the job is marked failed
+
+    Returns:
+        str: The job id
+    """
+    now = _now()
+    result = db[JOBS_COLLECTION].insert_one({
+        "kind": kind,
+        "payload": payload,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_at": now,
+        "lease_until": None,
+        "worker": None,
+        "call_id": None,
+        "call_ids": [],
+        "dialing_at": None,
+        "last_error": None,
+        "created_at": now,
+        "updated_at": now,
+    })
+    return str(result.inserted_id)
+
+
+def enqueue_once(db, key, ttl, body, kind, payload, max_attempts=MAX_ATTEMPTS):
+    """
+    Add a job unless a request with the same idempotency key already did.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        key (str), ttl (int): From idempotency.resolve_key
+        body (dict): The request body the key was issued for
+        kind, payload, max_attempts: As for enqueue
+
+    Returns:
+        tuple: (job id, True if this is a repeat). The job id is None for a
+        repeat that arrives while the first request is still being handled.
+
+    Raises:
+        idempotency.KeyConflict: The key was used with a different body
+        idempotency.KeyInUse: Other requests kept racing for the key
+    """
+    previous = idempotency.reserve(db, key, body, ttl)
+    if previous:
+        return (previous["result"] or {}).get("job_id"), True
+    try:
+        job_id = enqueue(db, kind, payload, max_attempts)
+    except Exception:
+        idempotency.release(db, key)
+        raise
+    idempotency.complete(db, key, {"job_id": job_id})
+    return job_id, False
+
+
+def claim(db, worker_id, kinds, lease_seconds=LEASE_SECONDS):
+    """
+    Atomically take the oldest due job, or one whose lease has expired.
+
+    Returns:
+        dict: The claimed job, or None if there is nothing to do
+    """
+    now = _now()
+    return db[JOBS_COLLECTION].find_one_and_update(
+        {
+            "kind": {"$in": list(kinds)},
+            "$or": [
+                {"status": "queued", "run_at": {"$lte": now}},
+                {"status": "running", "lease_until": {"$lt": now}},
+            ],
+        },
+        {
+            "$set": {
+                "status": "running",
+                "worker": worker_id,
+                "lease_until": now + timedelta(seconds=lease_seconds),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _retry_or_fail(job, error, now):
+    if job["attempts"] < job["max_attempts"]:
+        return {
+            "status": "queued",
+            "run_at": now + timedelta(seconds=backoff_seconds(job["attempts"])),
+            "lease_until": None,
+            "dialing_at": None,
+            "last_error": error,
+            "updated_at": now,
+        }
+    return {"status": "failed", "lease_until": None, "dialing_at": None, "last_error": error, "updated_at": now}
+
+
+def _renew_lease(db, job_id, worker_id, lease_seconds=LEASE_SECONDS):
+    """
+    Keep extending a job's lease from a background thread until the
+    returned event is set, so a slow handler is never reclaimed by
+    another worker mid-call.
+    """
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(lease_seconds / 3):
+            try:
+                db[JOBS_COLLECTION].update_one(
+                    {"_id": job_id, "worker": worker_id, "status": "running"},
+                    {"$set": {"lease_until": _now() + timedelta(seconds=lease_seconds)}}
+                )
+            except Exception as e:
+                print(f"Failed to renew lease on call job {job_id}: {str(e)}")
+
+    threading.Thread(target=renew, name=f"call-job-lease-{job_id}", daemon=True).start()
+    return stop
+
+
+def run_job(db, job, worker_id):
+    """
+    Run one claimed job and record the outcome.
+
+    Returns:
+        str: The job's new status, or None if the lease was lost meanwhile
+    """
+    unknown = False
+    if job.get("dialing_at"):
+        # Reclaimed after a worker started dialing and never recorded the result
+        call_id, error, unknown = None, "Worker lost its lease while dialing; the call may have been placed", True
+    elif job["attempts"] > job["max_attempts"]:
+        # Reclaimed after its last attempt's lease expired
+        call_id, error = None, "Worker lease expired on the last attempt"
+    else:
+        marked = db[JOBS_COLLECTION].update_one(
+            {"_id": job["_id"], "worker": worker_id, "status": "running"},
+            {"$set": {"dialing_at": _now()}}
+        )
+        if not marked.matched_count:
+            return None
+        stop_renewing = _renew_lease(db, job["_id"], worker_id)
+        try:
+            call_id = HANDLERS[job["kind"]](db, job["payload"])
+            error = None if call_id else "Failed to initiate outbound call"
+        except CallOutcomeUnknown as e:
+            call_id, error, unknown = None, str(e), True
+        except Exception as e:
+            call_id, error = None, str(e)
+        finally:
+            stop_renewing.set()
+
+    now = _now()
+    if unknown:
+        print(f"Call job {job['_id']} attempt {job['attempts']} has an unknown outcome: {error}")
+        update = {"$set": {"status": "unknown", "lease_until": None, "last_error": error, "updated_at": now}}
+    elif call_id:
+        update = {
+            "$set": {"status": "dialed", "call_id": call_id, "lease_until": None,
+                     "dialing_at": None, "last_error": None, "updated_at": now},
+            "$push": {"call_ids": call_id},
+        }
+    else:
+        print(f"Call job {job['_id']} attempt {job['attempts']} failed: {error}")
+        update = {"$set": _retry_or_fail(job, error, now)}
+
+    result = db[JOBS_COLLECTION].update_one({"_id": job["_id"], "worker": worker_id, "status": "running"}, update)
+    return update["$set"]["status"] if result.matched_count else None
+
+
+def call_ended(db, call_id, ended_reason):
+    """
+    Settle the job that placed a call once the call ends. Unanswered calls
+    are retried with backoff.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        call_id (str): The Vapi call id
+        ended_reason (str): Vapi's endedReason for the call
+    """
+    job = db[JOBS_COLLECTION].find_one({"call_id": call_id, "status": "dialed"})
+    if not job:
+        return
+    now = _now()
+    if ended_reason in NO_ANSWER_REASONS:
+        update = _retry_or_fail(job, f"Call ended: {ended_reason}", now)
+        update["call_id"] = None
+    else:
+        update = {"status": "completed", "updated_at": now}
+    db[JOBS_COLLECTION].update_one({"_id": job["_id"], "status": "dialed"}, {"$set": update})
+
+
+def get_job(db, job_id):
+    """
+    Look up a job by id.
+
+    Returns:
+        dict: The job as returned by the API, or None if there is no such job
+    """
+    try:
+        job = db[JOBS_COLLECTION].find_one({"_id": ObjectId(job_id)})
+    except InvalidId:
+        return None
+    return to_job(job) if job else None
+
+
+def to_job(job):
+    return {
+        "job_id": str(job["_id"]),
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "call_id": job.get("call_id"),
+        "call_ids": job.get("call_ids", []),
+        "last_error": job.get("last_error"),
+        "run_at": job["run_at"].isoformat() if job.get("run_at") else None,
+        "created_at": job["created_at"].isoformat(),
+        "updated_at": job["updated_at"].isoformat(),
+    }
+
+
+def _run(db, worker_id, poll_interval):
+    while True:
+        job = None
+        try:
+            if HANDLERS:
+                job = claim(db, worker_id, HANDLERS)
+            if job:
+                run_job(db, job, worker_id)
+        except Exception as e:
+            print(f"Call job worker {worker_id} error: {str(e)}")
+        if not job:
+            time.sleep(poll_interval)
+
+
+def start_workers(db, count, poll_interval=POLL_INTERVAL):
+    """
+    Make sure at least `count` worker threads are running in this process.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        count (int): Number of worker threads
+        poll_interval (float): Seconds to wait when the queue is empty
+    """
+    with _threads_lock:
+        _threads[:] = [thread for thread in _threads if thread.is_alive()]
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        while len(_threads) < count:
+            i = len(_threads)
+            thread = threading.Thread(
+                target=_run, args=(db, f"{prefix}:{i}:{ObjectId()}", poll_interval),
+                name=f"call-job-{i}", daemon=True
+            )
+            thread.start()
+            _threads.append(thread)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ready Set Insure - outbound call job workers')
+    parser.add_argument('--workers', type=int, default=2, help='Worker threads in this process')
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL, help='Seconds to wait when the queue is empty')
+    args = parser.parse_args()
+
+    # Importing main registers the job handlers
+    from main import mongo
+    ensure_indexes(mongo.db)
+    start_workers(mongo.db, args.workers, args.poll_interval)
+    print(f"Started {args.workers} call job workers")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print("Stopping call job workers")
+
+
+if __name__ == "__main__":
+    main()
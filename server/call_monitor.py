@@ -0,0 +1,201 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime
+from pymongo import UpdateOne
+import vapi_async
+import call_events
+
+'''
+Watch many calls at once until they finish.
+
+Each call is polled on its own schedule, picked by its last status: every
+couple of seconds while it is ringing, every 15 seconds while the
+conversation is in progress, and not at all once it is terminal. All due
+calls are fetched together through one async client, and status transitions
+are written to call_records in one bulk_write every few seconds.
+
+Calls whose status already reaches us through the Vapi webhook (/callhook)
+are not polled while it keeps them current: the monitor reads their status
+from call_records instead. Without a database, or once a webhook call's
+status has not changed for WEBHOOK_STALE_AFTER seconds (a missed webhook),
+the call is polled like any other.
+
+Usage:
+import call_monitor
+final = call_monitor.monitor_calls(call_ids, db=mongo.db)
+'''
+
+TERMINAL_STATUSES = call_events.TERMINAL_STATUSES
+# Seconds between polls by last known status
+POLL_INTERVALS = {
+    "ringing": 2,
+    "queued": 3,
+    "initiated": 3,
+    "forwarding": 3,
+    "in-progress": 15,
+    "scheduled": 30,
+}
+DEFAULT_POLL_INTERVAL = 5
+WRITE_INTERVAL = 5
+WEBHOOK_CHECK_INTERVAL = 5
+# Seconds without a webhook status change before a call falls back to polling
+WEBHOOK_STALE_AFTER = 300
+# Consecutive failed fetches before a call is given up on
+MAX_FAILURES = 5
+
+
+def poll_interval(status):
+    return POLL_INTERVALS.get(status, DEFAULT_POLL_INTERVAL)
+
+
+def print_transition(call_id, previous, status):
+    print(f"Call {call_id}: {previous or 'unknown'} -> {status}")
+
+
+class CallMonitor:
+    def __init__(self, db=None, concurrency=vapi_async.DEFAULT_CONCURRENCY, on_transition=print_transition):
+        self.db = db
+        self.concurrency = concurrency
+        self.on_transition = on_transition
+        # call id -> last known status
+        self.statuses = {}
+        # call id -> final status (None if it could not be determined)
+        self.finished = {}
+        # webhook call id -> monotonic time its status last changed
+        self.webhook_calls = {}
+        self.failures = {}
+        self._due = []
+        self._pending = {}
+
+    def watch(self, call_id, status=None, webhook=False):
+        """
+        Start tracking a call.
+
+        Args:
+            call_id (str): The Vapi call id
+            status (str, optional): The status the caller last saw
+            webhook (bool): The call reports its status to /callhook, so read
+                it from call_records instead of polling Vapi. Ignored without
+                a database.
+        """
+        self.statuses[call_id] = status
+        if webhook and self.db is not None:
+            self.webhook_calls[call_id] = time.monotonic()
+        else:
+            heapq.heappush(self._due, (time.monotonic(), call_id))
+
+    def _transition(self, call_id, status, write=True):
+        previous = self.statuses.get(call_id)
+        if status == previous:
+            return
+        self.statuses[call_id] = status
+        if write:
+            self._pending[call_id] = status
+        if self.on_transition:
+            self.on_transition(call_id, previous, status)
+        if status in TERMINAL_STATUSES:
+            self.finished[call_id] = status
+
+    def flush(self):
+        """
+        Write the pending status transitions to call_records in one round trip.
+        """
+        pending, self._pending = self._pending, {}
+        if self.db is None or not pending:
+            return
+        checked = datetime.now().isoformat()
+        self.db.call_records.bulk_write([
+            UpdateOne({"call_id": call_id}, {"$set": {"status": status, "last_checked": checked}})
+            for call_id, status in pending.items()
+        ], ordered=False)
+
+    def _check_webhook_calls(self):
+        open_calls = [call_id for call_id in self.webhook_calls if call_id not in self.finished]
+        if not open_calls:
+            return
+        now = time.monotonic()
+        for record in self.db.call_records.find(
+                {"call_id": {"$in": open_calls}}, {"_id": 0, "call_id": 1, "status": 1}):
+            call_id = record["call_id"]
+            if record.get("status") and record["status"] != self.statuses.get(call_id):
+                self._transition(call_id, record["status"], write=False)
+                self.webhook_calls[call_id] = now
+        for call_id in open_calls:
+            if call_id not in self.finished and now - self.webhook_calls[call_id] >= WEBHOOK_STALE_AFTER:
+                print(f"No webhook update for call {call_id} in {WEBHOOK_STALE_AFTER}s; polling it instead")
+                del self.webhook_calls[call_id]
+                heapq.heappush(self._due, (now, call_id))
+
+    def _record_fetch(self, call_id, call):
+        status = (call or {}).get('status')
+        if status:
+            self.failures.pop(call_id, None)
+            self._transition(call_id, status)
+        else:
+            self.failures[call_id] = self.failures.get(call_id, 0) + 1
+            if self.failures[call_id] >= MAX_FAILURES:
+                print(f"Giving up on call {call_id} after {MAX_FAILURES} failed checks")
+                self.finished[call_id] = None
+                return
+        if call_id not in self.finished:
+            heapq.heappush(self._due, (time.monotonic() + poll_interval(self.statuses[call_id]), call_id))
+
+    async def run(self):
+        """
+        Track every watched call until all of them have finished.
+
+        Returns:
+            dict: call id -> final status
+        """
+        async with vapi_async.AsyncVapiClient(self.concurrency) as client:
+            last_flush = last_webhook_check = time.monotonic()
+            self._check_webhook_calls()
+            while len(self.finished) < len(self.statuses):
+                now = time.monotonic()
+                due = []
+                while self._due and self._due[0][0] <= now:
+                    due.append(heapq.heappop(self._due)[1])
+                if due:
+                    calls = await client.get_calls(due)
+                    for call_id, call in calls.items():
+                        self._record_fetch(call_id, call)
+
+                now = time.monotonic()
+                if self.webhook_calls and now - last_webhook_check >= WEBHOOK_CHECK_INTERVAL:
+                    self._check_webhook_calls()
+                    last_webhook_check = now
+                if now - last_flush >= WRITE_INTERVAL:
+                    self.flush()
+                    last_flush = now
+
+                wake = min(self._due[0][0] if self._due else now + WEBHOOK_CHECK_INTERVAL,
+                           last_flush + WRITE_INTERVAL)
+                if len(self.finished) < len(self.statuses):
+                    await asyncio.sleep(max(0, wake - time.monotonic()))
+        self.flush()
+        return dict(self.finished)
+
+
+def monitor_calls(call_ids, db=None, webhook=False, concurrency=vapi_async.DEFAULT_CONCURRENCY):
+    """
+    Track calls from synchronous code until they finish or Ctrl+C is pressed.
+
+    Args:
+        call_ids (list): Vapi call ids
+        db: The Mongo database (mongo.db), optional
+        webhook (bool): The calls report their status to /callhook
+        concurrency (int): Maximum Vapi requests in flight
+
+    Returns:
+        dict: call id -> final status (None for calls that were not resolved)
+    """
+    monitor = CallMonitor(db, concurrency)
+    for call_id in dict.fromkeys(call_ids):
+        monitor.watch(call_id, webhook=webhook)
+    try:
+        return asyncio.run(monitor.run())
+    except KeyboardInterrupt:
+        monitor.flush()
+        print("\nStopped monitoring call status.")
+        return {call_id: monitor.finished.get(call_id) for call_id in monitor.statuses}
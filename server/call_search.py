@@ -0,0 +1,123 @@
+import re
+from pymongo import ASCENDING, DESCENDING, TEXT
+
+'''
+Full-text search over stored call transcripts and summaries.
+
+Word and phrase queries use a Mongo text index over `transcript` and
+`summary` (summary matches rank higher). Prefix queries ("renew*") use the
+`terms` array that call_store fills in when a call is stored: an anchored
+regex on that multikey index is a range scan, not a collection scan.
+
+Query syntax:
+claim adjuster         calls containing both words (stemmed), ranked
+"policy renewal"       the exact phrase
+renew*                 any word starting with "renew"
+'''
+
+TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+QUERY_PART = re.compile(r'"([^"]+)"|(\S+)')
+MIN_TERM_LENGTH = 2
+MAX_PER_PAGE = 100
+SNIPPET_CHARS = 80
+
+
+def ensure_indexes(db, collection):
+    db[collection].create_index(
+        [("transcript", TEXT), ("summary", TEXT)],
+        name="transcript_summary_text",
+        weights={"summary": 5, "transcript": 1}
+    )
+    db[collection].create_index([("terms", ASCENDING)], name="terms")
+
+
+def index_terms(*texts):
+    """
+    The distinct lowercase words in the given texts, for prefix search.
+    """
+    terms = set()
+    for text in texts:
+        if text:
+            terms.update(t for t in TOKEN.findall(text.lower()) if len(t) >= MIN_TERM_LENGTH)
+    return sorted(terms)
+
+
+def parse_query(q):
+    """
+    Split a query into phrases, plain words and prefixes.
+
+    Returns:
+        tuple: (phrases, words, prefixes)
+    """
+    phrases, words, prefixes = [], [], []
+    for phrase, word in QUERY_PART.findall(q):
+        if phrase.strip():
+            phrases.append(phrase.strip())
+        elif word.endswith("*") and len(word) > 1:
+            prefixes.append(word[:-1].lower())
+        elif word:
+            words.append(word)
+    return phrases, words, prefixes
+
+
+def _snippet(doc, needles):
+    text = doc.get("transcript") or doc.get("summary") or ""
+    lowered = text.lower()
+    positions = [lowered.find(n.lower()) for n in needles]
+    positions = [p for p in positions if p >= 0]
+    start = max(min(positions) - SNIPPET_CHARS // 2, 0) if positions else 0
+    snippet = text[start:start + SNIPPET_CHARS * 2].strip()
+    return ("..." if start else "") + snippet
+
+
+def search(db, collection, q, page=1, per_page=20, policy_number=None):
+    """
+    Search stored calls.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        collection (str): The call store collection
+        q (str): The query, see the module docstring
+        page (int): 1-based page number
+        per_page (int): Results per page, at most MAX_PER_PAGE
+        policy_number (str, optional): Only search this policy's calls
+
+    Returns:
+        dict: results (call_id, policy_number, createdAt, summary, snippet,
+        score), page, per_page and has_more
+    """
+    phrases, words, prefixes = parse_query(q or "")
+    if not (phrases or words or prefixes):
+        raise ValueError("Query is empty")
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    page = max(1, page)
+
+    query = {}
+    if phrases or words:
+        query["$text"] = {"$search": " ".join(words + [f'"{p}"' for p in phrases])}
+    if prefixes:
+        query["$and"] = [{"terms": {"$regex": "^" + re.escape(p)}} for p in prefixes]
+    if policy_number:
+        query["policy_number"] = policy_number
+
+    projection = {"policy_number": 1, "createdAt": 1, "summary": 1, "transcript": 1}
+    if "$text" in query:
+        projection["score"] = {"$meta": "textScore"}
+        sort = [("score", {"$meta": "textScore"})]
+    else:
+        sort = [("createdAt", DESCENDING)]
+
+    cursor = db[collection].find(query, projection).sort(sort).skip((page - 1) * per_page).limit(per_page + 1)
+    docs = list(cursor)
+
+    needles = phrases + words + prefixes
+    results = [{
+        "call_id": doc["_id"],
+        "policy_number": doc.get("policy_number"),
+        "createdAt": doc.get("createdAt"),
+        "summary": doc.get("summary"),
+        "snippet": _snippet(doc, needles),
+        "score": round(doc["score"], 3) if "score" in doc else None,
+    } for doc in docs[:per_page]]
+
+    return {"results": results, "page": page, "per_page": per_page, "has_more": len(docs) > per_page}
@@ -0,0 +1,127 @@
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+from policy_extract import extract_policy_number
+import policy_cache
+import call_search
+import call_transcripts
+
+'''
+Local store for Vapi calls.
+
+Every call we know about is kept as one document in the `calls` collection,
+keyed by the Vapi call id and tagged with the policy number extracted from it.
+The policy number is extracted once, when the call is stored, so lookups by
+policy number are a single indexed query instead of a scan over the whole
+Vapi call list. The transcript is also split into timestamped message
+records once here (see call_transcripts).
+'''
+
+CALLS_COLLECTION = "calls"
+
+
+def ensure_indexes(db):
+    """
+    Create the indexes used by the call lookups. Safe to run on every startup.
+
+    Args:
+        db: The Mongo database (mongo.db)
+    """
+    db[CALLS_COLLECTION].create_index(
+        [("policy_number", ASCENDING), ("createdAt", DESCENDING)],
+        name="policy_number_createdAt"
+    )
+    call_search.ensure_indexes(db, CALLS_COLLECTION)
+    call_transcripts.ensure_indexes(db)
+
+
+def normalize_call(call_data):
+    """
+    Turn a raw Vapi call object into the document we store.
+
+    Args:
+        call_data (dict): A call object as returned by the Vapi API
+
+    Returns:
+        dict: The document to store, with `_id` set to the Vapi call id
+    """
+    analysis = call_data.get('analysis') or {}
+    summary = analysis.get('summary') or call_data.get('summary')
+    return {
+        "_id": call_data['id'],
+        "policy_number": extract_policy_number(call_data),
+        "assistantId": call_data.get('assistantId'),
+        "type": call_data.get('type'),
+        "status": call_data.get('status'),
+        "endedReason": call_data.get('endedReason'),
+        "customer": call_data.get('customer'),
+        "createdAt": call_data.get('createdAt'),
+        "updatedAt": call_data.get('updatedAt'),
+        "startedAt": call_data.get('startedAt'),
+        "endedAt": call_data.get('endedAt'),
+        "cost": call_data.get('cost'),
+        "summary": summary,
+        "transcript": call_data.get('transcript'),
+        "terms": call_search.index_terms(call_data.get('transcript'), summary),
+        "messages": call_data.get('messages'),
+        "analysis": analysis,
+        "recordingUrl": call_data.get('recordingUrl'),
+    }
+
+
+def upsert_calls(db, calls):
+    """
+    Insert or replace a batch of Vapi calls in one round trip.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        calls (list): Raw Vapi call objects
+
+    Returns:
+        int: Number of calls written
+    """
+    docs = [normalize_call(call) for call in calls if call.get('id')]
+    if not docs:
+        return 0
+    db[CALLS_COLLECTION].bulk_write(
+        [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs],
+        ordered=False
+    )
+    call_transcripts.store_messages(db, docs)
+    # Cached reads for these policies are now stale, in this process and others
+    policy_cache.invalidate(db, [doc["policy_number"] for doc in docs])
+    return len(docs)
+
+
+def find_latest_call(db, policy_number, projection=None):
+    """
+    Get the most recent stored call for a policy number.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        policy_number (str): The policy number to look up
+        projection (dict, optional): Fields to return
+
+    Returns:
+        dict: The stored call document, or None if there is none
+    """
+    return db[CALLS_COLLECTION].find_one(
+        {"policy_number": policy_number.strip()},
+        projection,
+        sort=[("createdAt", DESCENDING)]
+    )
+
+
+def update_status(db, call_id, status, updated_at=None):
+    """
+    Record a status change for a call, creating a stub document if the call
+    has not been stored yet.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        call_id (str): The Vapi call id
+        status (str): The new call status
+        updated_at (str, optional): ISO timestamp of the change
+    """
+    update = {"status": status}
+    if updated_at:
+        update["updatedAt"] = updated_at
+    db[CALLS_COLLECTION].update_one({"_id": call_id}, {"$set": update}, upsert=True)
@@ -0,0 +1,237 @@
+import argparse
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, DESCENDING, DeleteMany, ReplaceOne
+
+'''
+Structured, timestamped transcript messages per call.
+
+When a call is stored, its Vapi `messages` are turned into one document per
+spoken message in `call_messages`, carrying the speaker and the time the
+message was actually said (Vapi's `time`, or the call start plus
+`secondsFromStart`). Reads for the chat views are then an indexed range scan
+instead of re-splitting the transcript text on every request.
+
+Run:
+python call_transcripts.py --backfill   (build messages for calls already stored)
+'''
+
+MESSAGES_COLLECTION = "call_messages"
+# Vapi role -> sender used by the frontend; system prompts and tool calls are skipped
+ROLES = {"bot": "assistant", "assistant": "assistant", "user": "client"}
+TRANSCRIPT_PREFIXES = (("AI:", "assistant"), ("User:", "client"))
+BACKFILL_BATCH = 500
+
+
+def ensure_indexes(db):
+    db[MESSAGES_COLLECTION].create_index(
+        [("call_id", ASCENDING), ("seq", ASCENDING)],
+        name="call_id_seq",
+        unique=True
+    )
+    db[MESSAGES_COLLECTION].create_index(
+        [("policy_number", ASCENDING), ("timestamp", ASCENDING), ("seq", ASCENDING)],
+        name="policy_number_timestamp_seq"
+    )
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _iso(moment):
+    # A naive datetime is local time, as written by datetime.now().isoformat()
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def to_utc_iso(value):
+    """
+    Normalize a datetime or ISO string to the UTC "...Z" form message
+    timestamps use, so timestamps from different sources compare correctly.
+
+    Returns:
+        str: The UTC timestamp, or None if `value` is missing or unparseable
+    """
+    if isinstance(value, str):
+        value = _parse_time(value)
+    return _iso(value) if value else None
+
+
+def timestamp_sort_key(message):
+    """
+    Sort key for merged history messages; ones without a timestamp go last.
+    """
+    timestamp = message.get('timestamp')
+    return (timestamp is None, timestamp or "")
+
+
+def parse_messages(call):
+    """
+    Turn a stored call into message records.
+
+    Uses Vapi's `messages` when present. Calls that only have a transcript
+    string fall back to its "AI:" / "User:" lines, stamped with the call start.
+
+    Args:
+        call (dict): A call document from call_store.normalize_call
+
+    Returns:
+        list: Message records in spoken order
+    """
+    started = _parse_time(call.get('startedAt')) or _parse_time(call.get('createdAt'))
+    records = []
+
+    for message in call.get('messages') or ():
+        sender = ROLES.get(message.get('role'))
+        text = (message.get('message') or message.get('content') or "").strip()
+        if not sender or not text:
+            continue
+        seconds = message.get('secondsFromStart')
+        if message.get('time'):
+            moment = datetime.fromtimestamp(message['time'] / 1000, timezone.utc)
+        elif started and seconds is not None:
+            moment = started + timedelta(seconds=seconds)
+        else:
+            moment = started
+        records.append({
+            "message": text,
+            "sender": sender,
+            "timestamp": _iso(moment) if moment else None,
+            "seconds_from_start": seconds,
+        })
+
+    if not records and call.get('transcript'):
+        for line in call['transcript'].split('\n'):
+            for prefix, sender in TRANSCRIPT_PREFIXES:
+                if line.startswith(prefix) and line[len(prefix):].strip():
+                    records.append({
+                        "message": line[len(prefix):].strip(),
+                        "sender": sender,
+                        "timestamp": _iso(started) if started else None,
+                        "seconds_from_start": None,
+                    })
+                    break
+
+    for seq, record in enumerate(records, start=1):
+        record.update({"call_id": call['_id'], "policy_number": call.get('policy_number'), "seq": seq})
+    return records
+
+
+def store_messages(db, calls):
+    """
+    Replace the message records of a batch of calls in one round trip.
+
+    Each record is upserted on (call_id, seq) and records past the new last
+    seq are deleted, so the webhook and vapi_sync can store the same call at
+    the same time without tripping the unique index.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        calls (list): Call documents from call_store.normalize_call
+
+    Returns:
+        int: Number of message records written
+    """
+    ops = []
+    written = 0
+    for call in calls:
+        records = parse_messages(call)
+        if not records and not call.get('transcript'):
+            # Nothing to replace the existing records with
+            continue
+        ops.extend(
+            ReplaceOne({"call_id": record["call_id"], "seq": record["seq"]}, record, upsert=True)
+            for record in records
+        )
+        ops.append(DeleteMany({"call_id": call['_id'], "seq": {"$gt": len(records)}}))
+        written += len(records)
+    if ops:
+        db[MESSAGES_COLLECTION].bulk_write(ops, ordered=False)
+    return written
+
+
+def to_message(doc):
+    return {
+        "id": f"{doc['call_id']}_{doc['seq']}",
+        "call_id": doc['call_id'],
+        "message": doc['message'],
+        "sender": doc['sender'],
+        "timestamp": doc['timestamp'],
+        "seconds_from_start": doc.get('seconds_from_start'),
+    }
+
+
+def call_messages(db, call_id):
+    """
+    The messages of one call in spoken order.
+    """
+    cursor = db[MESSAGES_COLLECTION].find({"call_id": call_id}, {"_id": 0}).sort("seq", ASCENDING)
+    return [to_message(doc) for doc in cursor]
+
+
+def policy_messages(db, policy_number, limit=500):
+    """
+    The most recent messages across all of a policy's calls, oldest first.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        policy_number (str): The policy to read
+        limit (int): Maximum number of messages
+
+    Returns:
+        list: Messages as {"id", "call_id", "message", "sender", "timestamp",
+        "seconds_from_start"}
+    """
+    docs = list(db[MESSAGES_COLLECTION].find(
+        {"policy_number": policy_number},
+        {"_id": 0}
+    ).sort([("timestamp", DESCENDING), ("seq", DESCENDING)]).limit(limit))
+    return [to_message(doc) for doc in reversed(docs)]
+
+
+def backfill(db, collection, batch_size=BACKFILL_BATCH):
+    """
+    Build message records for every call in the call store.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        collection (str): The call store collection
+        batch_size (int): Calls per bulk write
+
+    Returns:
+        int: Number of message records written
+    """
+    written = 0
+    batch = []
+    projection = {"policy_number": 1, "messages": 1, "transcript": 1, "startedAt": 1, "createdAt": 1}
+    for call in db[collection].find({}, projection):
+        batch.append(call)
+        if len(batch) >= batch_size:
+            written += store_messages(db, batch)
+            batch = []
+    if batch:
+        written += store_messages(db, batch)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ready Set Insure - call transcript messages')
+    parser.add_argument('--backfill', action='store_true', help='Build messages for calls already stored')
+    args = parser.parse_args()
+
+    if not args.backfill:
+        parser.print_help()
+        return
+
+    from main import mongo
+    import call_store
+    ensure_indexes(mongo.db)
+    print(f"Wrote {backfill(mongo.db, call_store.CALLS_COLLECTION)} messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import json
+from datetime import datetime
+from pymongo import ASCENDING, ReturnDocument
+import repositories as repo
+
+'''
+Append-only chat messages per policy.
+
+Each message is its own document in `chat_messages`, numbered by a per-policy
+sequence kept on the client document (`chat_seq`). Appending is one counter
+increment plus one insert regardless of history length, and reading history
+is a range scan on the (policy_number, seq) index.
+
+Run once after upgrading from the single `chatlog` string per client:
+python chat_messages.py --migrate
+'''
+
+MESSAGES_COLLECTION = "chat_messages"
+LEGACY_PREFIXES = (("AI:", "assistant"), ("User:", "client"))
+
+
+def ensure_indexes(db):
+    db[MESSAGES_COLLECTION].create_index(
+        [("policy_number", ASCENDING), ("seq", ASCENDING)],
+        name="policy_number_seq",
+        unique=True
+    )
+
+
+def next_seq(db, policy_number):
+    """
+    Atomically take the next message number for a policy. This also checks
+    that the client exists, so appending needs no separate lookup.
+
+    Returns:
+        int: The sequence number, or None if no client has this policy number
+    """
+    return repo.increment_client_counter(db, policy_number, "chat_seq")
+
+
+def append_message(db, policy_number, message, sender, timestamp=None):
+    """
+    Append one message to a policy's chat history.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        policy_number (str): The policy the message belongs to
+        message (str): The message text
+        sender (str): "client", "assistant" or "system"
+        timestamp (str, optional): ISO timestamp, defaults to now
+
+    Returns:
+        dict: The stored message, with `id` set to its sequence number,
+        or None if no client has this policy number
+    """
+    seq = next_seq(db, policy_number)
+    if seq is None:
+        return None
+    doc = {
+        "policy_number": policy_number,
+        "seq": seq,
+        "message": message,
+        "sender": sender,
+        "timestamp": timestamp or datetime.now().isoformat()
+    }
+    db[MESSAGES_COLLECTION].insert_one(doc)
+    return to_message(doc)
+
+
+def get_messages(db, policy_number, after=0, limit=None):
+    """
+    Read a policy's chat history in order.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        policy_number (str): The policy to read
+        after (int): Only return messages with a higher sequence number
+        limit (int, optional): Maximum number of messages
+
+    Returns:
+        list: Messages as {"id", "message", "sender", "timestamp"}
+    """
+    cursor = db[MESSAGES_COLLECTION].find(
+        {"policy_number": policy_number, "seq": {"$gt": after}},
+        {"_id": 0}
+    ).sort("seq", ASCENDING)
+    if limit:
+        cursor = cursor.limit(limit)
+    return [to_message(doc) for doc in cursor]
+
+
+def to_message(doc):
+    return {
+        "id": doc["seq"],
+        "message": doc["message"],
+        "sender": doc["sender"],
+        "timestamp": doc["timestamp"]
+    }
+
+
+def parse_legacy_chatlog(chatlog):
+    """
+    Read a client's old `chatlog` string: a JSON list of messages, or
+    "AI:" / "User:" transcript lines.
+
+    Returns:
+        list: (message, sender, timestamp or None) tuples
+    """
+    try:
+        entries = json.loads(chatlog)
+    except ValueError:
+        entries = None
+    if isinstance(entries, list):
+        return [
+            (entry["message"], entry.get("sender", "client"), entry.get("timestamp"))
+            for entry in entries if isinstance(entry, dict) and entry.get("message")
+        ]
+
+    messages = []
+    for line in chatlog.split("\n"):
+        for prefix, sender in LEGACY_PREFIXES:
+            if line.startswith(prefix) and line[len(prefix):].strip():
+                messages.append((line[len(prefix):].strip(), sender, None))
+                break
+    return messages
+
+
+def migrate_legacy(db):
+    """
+    Copy each client's old `chatlog` string into chat_messages. Safe to run
+    more than once.
+
+    Messages are numbered after any the client already has, and the client
+    is marked `chatlog_migrated`.
+
+    Returns:
+        dict: Number of clients migrated and messages copied
+    """
+    report = {"clients": 0, "messages": 0}
+    query = {"chatlog": {"$nin": ["", None]}, "chatlog_migrated": {"$ne": True}}
+    for client in db.clients.find(query, {"policy_number": 1, "chatlog": 1}):
+        messages = parse_legacy_chatlog(client["chatlog"]) if isinstance(client["chatlog"], str) else []
+        # Claim the client and its sequence numbers in one update, so two
+        # runs never copy the same chatlog
+        claimed = db.clients.find_one_and_update(
+            {"_id": client["_id"], "chatlog_migrated": {"$ne": True}},
+            {"$set": {"chatlog_migrated": True}, "$inc": {"chat_seq": len(messages)}},
+            projection={"chat_seq": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        if claimed is None or not messages:
+            continue
+        first = claimed.get("chat_seq", 0) + 1
+        migrated_at = datetime.now().isoformat()
+        db[MESSAGES_COLLECTION].insert_many([
+            {
+                "policy_number": client["policy_number"],
+                "seq": first + i,
+                "message": message,
+                "sender": sender,
+                "timestamp": timestamp or migrated_at,
+            }
+            for i, (message, sender, timestamp) in enumerate(messages)
+        ])
+        report["clients"] += 1
+        report["messages"] += len(messages)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ready Set Insure - chat messages')
+    parser.add_argument('--migrate', action='store_true', help='Copy old chatlog strings into chat_messages')
+    args = parser.parse_args()
+
+    if not args.migrate:
+        parser.print_help()
+        return
+
+    from main import mongo
+    ensure_indexes(mongo.db)
+    report = migrate_legacy(mongo.db)
+    print(f"Copied {report['messages']} messages from {report['clients']} clients")
+
+
+if __name__ == "__main__":
+    main()
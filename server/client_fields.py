@@ -0,0 +1,55 @@
+'''
+Sparse fieldsets for the client endpoints.
+
+Callers pass `fields=` as either a preset name or a comma-separated list of
+client fields, and it is turned into a Mongo projection so only those fields
+are read and sent.
+
+Examples:
+GET /GetAllClients?fields=list
+POST /GetClientByPolicyNumber?fields=name,phone,status
+'''
+
+CLIENT_FIELDS = (
+    "name", "dob", "policy_number", "email", "phone", "sex",
+    "status", "date", "chatlog", "summary",
+)
+
+PRESETS = {
+    # Columns the dashboard list renders
+    "list": ("name", "email", "status", "date", "policy_number"),
+    # Everything the customer page shows
+    "detail": CLIENT_FIELDS,
+}
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def projection(fields, default):
+    """
+    Build a Mongo projection from a `fields` parameter.
+
+    Args:
+        fields (str): A preset name, a comma-separated field list, or None
+        default (dict): Projection to use when `fields` is empty
+
+    Returns:
+        dict: The projection
+
+    Raises:
+        InvalidFields: If a requested field is not a client field
+    """
+    if not fields:
+        return default
+    if fields in PRESETS:
+        names = PRESETS[fields]
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in CLIENT_FIELDS]
+        if unknown or not names:
+            raise InvalidFields(
+                f"Unknown fields: {', '.join(unknown) or fields}. "
+                f"Use a preset ({', '.join(PRESETS)}) or any of: {', '.join(CLIENT_FIELDS)}")
+    return {name: 1 for name in names}
@@ -0,0 +1,225 @@
+import argparse
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from itertools import islice
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import repositories as repo
+
+'''
+Bulk import of clients from CSV or NDJSON.
+
+Rows are streamed from the file or request body, validated one at a time and
+written in chunks with unordered insert_many (or upserts on policy_number),
+so memory stays bounded and a bad row never stops the import. Per-row errors
+and throughput are reported at the end. An upsert only sets the fields the row
+provides; defaults are applied to new clients only, so an existing client's
+summary, chatlog and status survive a re-import.
+
+Run:
+python client_import.py clients.csv
+python client_import.py clients.ndjson --upsert --chunk-size 5000
+
+Endpoint:
+POST /ImportClients?format=csv&upsert=true   (body is the file)
+'''
+
+CHUNK_SIZE = 1000
+# Only the first errors are kept in the report
+MAX_REPORTED_ERRORS = 1000
+
+REQUIRED_FIELDS = ("policy_number", "name")
+CLIENT_DEFAULTS = {
+    "dob": None,
+    "email": None,
+    "phone": None,
+    "sex": "Unknown",
+    "status": "incomplete",
+    "date": None,
+    "chatlog": "",
+    "summary": "",
+}
+
+
+def read_rows(stream, fmt):
+    """
+    Yield rows from a text stream.
+
+    Args:
+        stream: A text file-like object
+        fmt (str): "csv" or "ndjson"
+
+    Yields:
+        tuple: (row number, dict or None, parse error or None)
+    """
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, row, None
+    elif fmt == "ndjson":
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, None, f"Invalid JSON: {str(e)}"
+                continue
+            if not isinstance(row, dict):
+                yield number, None, "Row must be a JSON object"
+                continue
+            yield number, row, None
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+
+def validate_row(row):
+    """
+    Turn an input row into the client fields it provides.
+
+    Returns:
+        tuple: (client dict, None) or (None, error message). Fields the row
+        leaves empty are omitted; see with_defaults.
+    """
+    missing = [field for field in REQUIRED_FIELDS if not str(row.get(field) or "").strip()]
+    if missing:
+        return None, f"Missing {', '.join(missing)}"
+
+    client = {"policy_number": str(row["policy_number"]).strip(), "name": str(row["name"]).strip()}
+    for field in CLIENT_DEFAULTS:
+        value = row.get(field)
+        if value not in (None, ""):
+            client[field] = value
+    return client, None
+
+
+def with_defaults(client):
+    """
+    A complete document for a new client.
+    """
+    return {**CLIENT_DEFAULTS, **client}
+
+
+def _upsert_update(client):
+    update = {"$set": client}
+    # Defaults only fill in a new client, never overwrite an existing one
+    missing = {field: default for field, default in CLIENT_DEFAULTS.items() if field not in client}
+    if missing:
+        update["$setOnInsert"] = missing
+    return update
+
+
+def _write_chunk(db, chunk, upsert, report):
+    updated_at = datetime.now().isoformat()
+    clients = [{**client, "updated_at": updated_at} for _, client in chunk]
+    if not upsert:
+        # Through the repository, which rejects duplicates even without the unique index
+        inserted, errors = repo.create_clients(db, [with_defaults(c) for c in clients])
+        report["inserted"] += inserted
+        for index, message in errors:
+            _add_error(report, chunk[index][0], message)
+        return
+
+    try:
+        result = db.clients.bulk_write(
+            [UpdateOne({"policy_number": c["policy_number"]}, _upsert_update(c), upsert=True) for c in clients],
+            ordered=False
+        )
+        report["inserted"] += result.upserted_count
+        report["updated"] += result.modified_count
+    except BulkWriteError as e:
+        details = e.details
+        report["inserted"] += details.get("nUpserted", 0)
+        report["updated"] += details.get("nModified", 0)
+        for error in details.get("writeErrors", ()):
+            number = chunk[error["index"]][0]
+            message = repo.DUPLICATE_POLICY_NUMBER if error.get("code") == 11000 else error.get("errmsg")
+            _add_error(report, number, message)
+
+
+def _add_error(report, number, message):
+    report["failed"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"row": number, "error": message})
+
+
+def import_clients(db, rows, upsert=False, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Validate and write clients in chunks.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        rows: Iterable of (row number, dict or None, parse error or None)
+        upsert (bool): Update existing clients by policy_number instead of
+            reporting them as duplicates
+        chunk_size (int): Documents per insert_many / bulk_write
+        progress (callable, optional): Called with the report after each chunk
+
+    Returns:
+        dict: Counts, per-row errors, elapsed seconds and rows per second
+    """
+    report = {"rows": 0, "inserted": 0, "updated": 0, "failed": 0, "errors": []}
+    start = time.perf_counter()
+
+    def valid_rows():
+        for number, row, error in rows:
+            report["rows"] += 1
+            client = None
+            if not error:
+                client, error = validate_row(row)
+            if error:
+                _add_error(report, number, error)
+                continue
+            yield number, client
+
+    valid = valid_rows()
+    while True:
+        chunk = list(islice(valid, chunk_size))
+        if not chunk:
+            break
+        _write_chunk(db, chunk, upsert, report)
+        if progress:
+            progress(report)
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["rows_per_second"] = round(report["rows"] / report["seconds"]) if report["seconds"] else None
+    return report
+
+
+def import_stream(db, binary_stream, fmt, upsert=False, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Import clients from a binary stream such as a request body.
+    """
+    stream = io.TextIOWrapper(binary_stream, encoding="utf-8", newline="")
+    return import_clients(db, read_rows(stream, fmt), upsert, chunk_size, progress)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ready Set Insure - bulk client import')
+    parser.add_argument('path', help='CSV or NDJSON file to import')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help='Input format (default: from the file extension)')
+    parser.add_argument('--upsert', action='store_true', help='Update existing clients instead of reporting duplicates')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Documents per write')
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+
+    from main import mongo
+
+    def progress(report):
+        print(f"\r{report['rows']} rows, {report['inserted']} inserted, {report['failed']} failed", end="", flush=True)
+
+    with open(args.path, newline="", encoding="utf-8") as stream:
+        report = import_clients(mongo.db, read_rows(stream, fmt), args.upsert, args.chunk_size, progress)
+
+    print()
+    for error in report["errors"]:
+        print(f"Row {error['row']}: {error['error']}")
+    print(f"Imported {report['inserted']} clients, updated {report['updated']}, "
+          f"{report['failed']} failed in {report['seconds']}s ({report['rows_per_second']} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
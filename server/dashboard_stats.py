@@ -0,0 +1,65 @@
+'''
+Aggregated numbers for the employee dashboard.
+
+The counts and chart series are computed in Mongo with aggregation pipelines
+so the response stays a few hundred bytes however many clients there are.
+'''
+
+WEEKDAYS = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+
+
+def client_stats(db):
+    """
+    Count clients by status, by day and by weekday in one aggregation.
+
+    Returns:
+        dict: total, by_status, by_date (YYYY-MM-DD -> count), by_weekday
+    """
+    pipeline = [
+        {"$project": {
+            "status": 1,
+            "day": {"$dateFromString": {
+                "dateString": {"$substrCP": [{"$ifNull": ["$date", ""]}, 0, 10]},
+                "format": "%Y-%m-%d",
+                "onError": None,
+                "onNull": None
+            }}
+        }},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "by_date": [
+                {"$match": {"day": {"$ne": None}}},
+                {"$group": {"_id": {"$dateToString": {"date": "$day", "format": "%Y-%m-%d"}}, "count": {"$sum": 1}}}
+            ],
+            "by_weekday": [
+                {"$match": {"day": {"$ne": None}}},
+                {"$group": {"_id": {"$dayOfWeek": "$day"}, "count": {"$sum": 1}}}
+            ],
+        }},
+    ]
+    result = next(db.clients.aggregate(pipeline), {})
+
+    weekday_counts = {row["_id"]: row["count"] for row in result.get("by_weekday", ())}
+    return {
+        "total": result["total"][0]["count"] if result.get("total") else 0,
+        "by_status": {row["_id"] or "unknown": row["count"] for row in result.get("by_status", ())},
+        "by_date": {row["_id"]: row["count"] for row in result.get("by_date", ())},
+        # $dayOfWeek is 1 (Sunday) to 7 (Saturday)
+        "by_weekday": [{"name": name, "total": weekday_counts.get(i + 1, 0)} for i, name in enumerate(WEEKDAYS)],
+    }
+
+
+def call_outcomes(db):
+    """
+    Count call records by status.
+
+    Returns:
+        dict: status -> count
+    """
+    rows = db.call_records.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+    return {row["_id"] or "unknown": row["count"] for row in rows}
+
+
+def dashboard_stats(db):
+    return {"clients": client_stats(db), "calls": call_outcomes(db)}
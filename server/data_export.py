@@ -0,0 +1,117 @@
+import argparse
+import contextlib
+import json
+import sys
+import zlib
+import call_store
+
+'''
+Streaming NDJSON export of clients, call records and stored transcripts.
+
+Documents are read from a Mongo cursor in batches and written one line at a
+time, optionally gzip-compressed on the fly, so memory use does not depend
+on collection size. updated_since limits the export to documents changed
+at or after an ISO timestamp for incremental exports.
+
+Run:
+python data_export.py clients > clients.ndjson
+python data_export.py transcripts --updated-since 2025-03-01 --gzip -o transcripts.ndjson.gz
+
+Endpoint:
+GET /export/<dataset>?updated_since=2025-03-01&gzip=true
+'''
+
+BATCH_SIZE = 1000
+# Bytes of output buffered before a chunk is yielded
+FLUSH_BYTES = 64 * 1024
+
+# dataset -> (collection, projection, timestamp fields for updated_since)
+DATASETS = {
+    "clients": ("clients", {"password": 0}, ("updated_at",)),
+    "call_records": ("call_records", None, ("last_checked", "call_time")),
+    "transcripts": (
+        call_store.CALLS_COLLECTION,
+        {"policy_number": 1, "createdAt": 1, "updatedAt": 1, "status": 1,
+         "summary": 1, "transcript": 1, "messages": 1},
+        ("updatedAt",)
+    ),
+}
+
+
+def export_query(dataset, updated_since=None):
+    collection, projection, time_fields = DATASETS[dataset]
+    query = {}
+    if updated_since:
+        query = {"$or": [{field: {"$gte": updated_since}} for field in time_fields]}
+    return collection, query, projection
+
+
+def export_lines(db, dataset, updated_since=None, batch_size=BATCH_SIZE):
+    """
+    Yield one NDJSON line per document, in _id order.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        dataset (str): One of DATASETS
+        updated_since (str, optional): ISO timestamp lower bound
+        batch_size (int): Documents fetched per cursor round trip
+    """
+    collection, query, projection = export_query(dataset, updated_since)
+    cursor = db[collection].find(query, projection).sort("_id", 1).batch_size(batch_size)
+    for doc in cursor:
+        yield json.dumps(doc, default=str) + "\n"
+
+
+def export_stream(db, dataset, updated_since=None, gzip=False, batch_size=BATCH_SIZE):
+    """
+    Yield the export as byte chunks, gzip-compressed if requested.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    buffer = []
+    size = 0
+
+    def flush():
+        data = "".join(buffer).encode("utf-8")
+        buffer.clear()
+        return compressor.compress(data) if compressor else data
+
+    for line in export_lines(db, dataset, updated_since, batch_size):
+        buffer.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            size = 0
+            chunk = flush()
+            if chunk:
+                yield chunk
+
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ready Set Insure - NDJSON export')
+    parser.add_argument('dataset', choices=list(DATASETS), help='What to export')
+    parser.add_argument('--updated-since', help='Only export documents updated at or after this ISO timestamp')
+    parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Documents per cursor batch')
+    parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    args = parser.parse_args()
+
+    # Keep startup messages out of an export written to stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        from main import mongo
+
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in export_stream(mongo.db, args.dataset, args.updated_since, args.gzip, args.batch_size):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
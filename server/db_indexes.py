@@ -0,0 +1,129 @@
+import sys
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+import call_store
+import status_refresher
+import chat_messages
+import call_transcripts
+import call_jobs
+import idempotency
+
+'''
+Index bootstrap and query-plan checks for the hot queries in main.py.
+
+ensure_indexes() runs at startup and is idempotent: create_index is a no-op
+for an index that already exists with the same spec. verify_query_plans()
+explains each route's query and reports any that would scan a collection.
+
+Run:
+python db_indexes.py           (create indexes)
+python db_indexes.py --verify  (create indexes, then exit 1 on any COLLSCAN)
+'''
+
+# collection -> [(keys, options)]
+INDEXES = {
+    "clients": [
+        ([("policy_number", ASCENDING)], {"name": "policy_number", "unique": True}),
+    ],
+    "users": [
+        ([("email", ASCENDING)], {"name": "email", "unique": True}),
+        ([("policy_number", ASCENDING)], {"name": "policy_number"}),
+    ],
+    "call_records": [
+        ([("call_id", ASCENDING)], {"name": "call_id", "unique": True}),
+        ([("policy_number", ASCENDING), ("call_time", DESCENDING)], {"name": "policy_number_call_time"}),
+    ],
+}
+
+
+def ensure_indexes(db):
+    """
+    Create every index the routes rely on. An index that cannot be built
+    (e.g. a unique index over existing duplicates) is reported and skipped;
+    repositories then checks for duplicates before inserting instead.
+
+    Args:
+        db: The Mongo database (mongo.db)
+
+    Returns:
+        list: Names of indexes that failed to build
+    """
+    failed = []
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                db[collection].create_index(keys, **options)
+            except OperationFailure as e:
+                print(f"Failed to create index {collection}.{options['name']}: {str(e)}")
+                failed.append(f"{collection}.{options['name']}")
+
+    call_store.ensure_indexes(db)
+    status_refresher.ensure_indexes(db)
+    chat_messages.ensure_indexes(db)
+    call_jobs.ensure_indexes(db)
+    idempotency.ensure_indexes(db)
+    return failed
+
+
+def route_queries(db):
+    """
+    The queries issued by the routes, as cursors that can be explained.
+    """
+    return {
+        "clients by policy_number": db.clients.find({"policy_number": ""}).limit(1),
+        "users by email": db.users.find({"email": ""}).limit(1),
+        "users by policy_number": db.users.find({"policy_number": ""}).limit(1),
+        "call_records by call_id": db.call_records.find({"call_id": ""}).limit(1),
+        "call_records by policy_number, newest first": db.call_records.find(
+            {"policy_number": ""}).sort("call_time", DESCENDING).limit(10),
+        "open call_records, least recently checked": status_refresher.open_records(db),
+        "calls by policy_number, newest first": db[call_store.CALLS_COLLECTION].find(
+            {"policy_number": ""}).sort("createdAt", DESCENDING).limit(1),
+        "chat_messages by policy_number": db[chat_messages.MESSAGES_COLLECTION].find(
+            {"policy_number": "", "seq": {"$gt": 0}}).sort("seq", ASCENDING),
+        "call_messages by call_id": db[call_transcripts.MESSAGES_COLLECTION].find(
+            {"call_id": ""}).sort("seq", ASCENDING),
+        "call_messages by policy_number, newest first": db[call_transcripts.MESSAGES_COLLECTION].find(
+            {"policy_number": ""}).sort([("timestamp", DESCENDING), ("seq", DESCENDING)]).limit(500),
+        "call_jobs by call_id": db[call_jobs.JOBS_COLLECTION].find({"call_id": "", "status": "dialed"}).limit(1),
+    }
+
+
+def _stages(plan):
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from _stages(plan["inputStage"])
+    for child in plan.get("inputStages", ()):
+        yield from _stages(child)
+
+
+def verify_query_plans(db):
+    """
+    Explain each route query and find the ones whose winning plan is a
+    collection scan.
+
+    Args:
+        db: The Mongo database (mongo.db)
+
+    Returns:
+        list: Names of the queries that use a COLLSCAN
+    """
+    scans = []
+    for name, cursor in route_queries(db).items():
+        plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        # Plans from the slot-based engine nest the classic plan one level down
+        plan = plan.get("queryPlan", plan)
+        if "COLLSCAN" in _stages(plan):
+            print(f"Query '{name}' uses a COLLSCAN")
+            scans.append(name)
+    return scans
+
+
+if __name__ == "__main__":
+    from main import mongo
+    failed = ensure_indexes(mongo.db)
+    if "--verify" in sys.argv:
+        scans = verify_query_plans(mongo.db)
+        if failed or scans:
+            sys.exit(1)
+        print("All route queries use an index")
@@ -0,0 +1,288 @@
+import os
+from datetime import datetime
+from flask import request, jsonify
+from dotenv import load_dotenv
+import requests
+import vapi_client
+import repositories as repo
+import call_transcripts
+import call_jobs
+import idempotency
+
+'''
+Outbound feedback calls and the routes around them.
+
+Shared by main.py and customer_outbound_calls.py: init_app registers the
+routes on either app, and importing this module registers the
+`customer_feedback` job handler, so call_jobs workers in any process that
+imports it can place the calls.
+'''
+
+load_dotenv()
+assistant_id = os.environ.get('VITE_ASSISTANT_ID')
+
+CALL_STATUS_TEXT = {
+    "initiated": "Call initiated",
+    "ringing": "Calling customer",
+    "in-progress": "In call with customer",
+    "completed": "Call completed successfully",
+    "failed": "Call failed to connect",
+    "canceled": "Call was canceled",
+    "ended": "Call ended"
+}
+
+
+def make_outbound_call(db, customer, feedback=None):
+    """
+    Make an outbound call to a customer using the pre-configured Vapi.ai assistant
+
+    Args:
+        db: The Mongo database (mongo.db)
+        customer (dict): Customer information including name, phone, policy_number, etc.
+        feedback (str, optional): Employee feedback to share with the customer.
+
+    Returns:
+        str: Call ID if call was created successfully, None if it was not.
+
+    Raises:
+        call_jobs.CallOutcomeUnknown: The request may have created the call.
+    """
+
+    # Create the data payload for the API request
+    data = {
+        'assistant': assistant_id,  # Use the pre-configured assistant ID
+        'phoneNumberId': customer.get('phone'),
+        'customer': {
+            'number': customer.get('phone'),
+        },
+        'variables': {
+            'customer_name': customer.get('name', 'Customer'),
+            'policy_number': customer.get('policy_number', 'Unknown'),
+            'employee_feedback': feedback or '',
+            'is_followup': 'true',
+            'offer_appointment': 'true'
+        }
+    }
+
+    # Log the outbound call attempt
+    print(f"Attempting to call {customer.get('name')} at {customer.get('phone')}")
+    if feedback:
+        print(f"With feedback: {feedback}")
+
+    try:
+        # Make the POST request to Vapi to create the phone call
+        response = vapi_client.post('/call/phone', endpoint='call.create', json=data)
+    except requests.ConnectTimeout as e:
+        # The request never reached Vapi, so no call was placed
+        print(f"Error making outbound call: {str(e)}")
+        return None
+    except requests.RequestException as e:
+        raise call_jobs.CallOutcomeUnknown(f"Vapi may have created the call: {str(e)}")
+
+    if response.status_code >= 500:
+        raise call_jobs.CallOutcomeUnknown(
+            f"Vapi returned {response.status_code}; the call may have been created")
+    if response.status_code != 201:
+        print('Failed to create call:')
+        print(response.text)
+        return None
+
+    call_data = response.json()
+    call_id = call_data.get('id')
+    print(f'Call created successfully with ID: {call_id}')
+
+    # Record in database that we made this call; the call is placed either way
+    call_record = {
+        "call_id": call_id,
+        "policy_number": customer.get('policy_number'),
+        "call_time": datetime.now().isoformat(),
+        "status": "initiated",
+        "feedback": feedback
+    }
+    try:
+        repo.create_call_record(db, call_record)
+        print("Call record added to database")
+    except Exception as e:
+        print(f"Error recording call {call_id}: {str(e)}")
+
+    return call_id
+
+
+def feedback_call_job(db, payload):
+    """
+    Run a queued feedback call: place the call and record the feedback.
+
+    Returns:
+        str: Call ID if the call was created, None otherwise.
+    """
+    call_id = make_outbound_call(db, payload["customer"], payload["feedback"])
+    if call_id:
+        # The call is placed; a failure here must not make the job dial again
+        try:
+            repo.update_user_by_policy(db, payload["customer"]["policy_number"], {
+                "last_feedback": payload["feedback"],
+                "last_feedback_date": datetime.now().isoformat()
+            })
+        except Exception as e:
+            print(f"Error recording feedback for call {call_id}: {str(e)}")
+    return call_id
+
+call_jobs.register("customer_feedback", feedback_call_job)
+
+
+def send_customer_feedback(db):
+    """
+    Queue a feedback call for the customer in the current request.
+
+    Sample Request:
+    {
+        "policy_number": "12345678",
+        "feedback": "..."
+    }
+    """
+    try:
+        data = request.json
+        policy_number = data.get('policy_number')
+        feedback = data.get('feedback')
+
+        if not policy_number or not feedback:
+            return jsonify({"error": "Policy number and feedback are required"}), 400
+
+        # Get customer data from database
+        customer_data = repo.find_user_by_policy(db, policy_number)
+
+        if not customer_data:
+            return jsonify({"error": "Customer not found"}), 404
+
+        # Create customer object for the outbound call
+        customer = {
+            "name": customer_data.get('name', 'Customer'),
+            "phone": customer_data.get('phone'),
+            "policy_number": policy_number,
+            "email": customer_data.get('email'),
+            "status": customer_data.get('status', 'active')
+        }
+
+        # Validate phone number
+        if not customer.get('phone') or not customer['phone'].startswith('+'):
+            return jsonify({"error": "Valid phone number with country code is required"}), 400
+
+        # A repeat of this request (same Idempotency-Key, or the same body
+        # shortly after) gets the original job back instead of a second call
+        body = {"policy_number": policy_number, "feedback": feedback}
+        try:
+            key, ttl = idempotency.resolve_key("SendCustomerFeedback", request.headers.get('Idempotency-Key'), body)
+            job_id, replayed = call_jobs.enqueue_once(
+                db, key, ttl, body, "customer_feedback", {"customer": customer, "feedback": feedback}
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except idempotency.KeyConflict as e:
+            return jsonify({"error": str(e)}), 422
+        except idempotency.KeyInUse as e:
+            return jsonify({"error": str(e)}), 409
+
+        if not replayed:
+            # Queue the call; a job worker places it and retries failures
+            return jsonify({
+                "success": True,
+                "message": "Feedback call queued",
+                "job_id": job_id
+            }), 202
+
+        if not job_id:
+            return jsonify({"error": "The original request is still being processed"}), 409
+        job = call_jobs.get_job(db, job_id) or {}
+        response = jsonify({
+            "success": True,
+            "message": "Feedback call already queued",
+            "job_id": job_id,
+            "call_id": job.get("call_id")
+        })
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response, 200
+
+    except Exception as e:
+        print(f"Error in send_customer_feedback: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def get_call_job(db, job_id):
+    """Return a queued outbound call job."""
+    job = call_jobs.get_job(db, job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+
+def get_call_history(db, policy_number):
+    """Return the transcript messages and outbound calls of a customer, oldest first."""
+    try:
+        # Transcript messages, parsed with their real timestamps when the calls were stored
+        messages = call_transcripts.policy_messages(db, policy_number)
+
+        # Get recent outbound calls for this policy number
+        calls = repo.recent_call_records(
+            db, policy_number, 10,
+            {"_id": 0, "call_id": 1, "call_time": 1, "status": 1, "feedback": 1}
+        )
+
+        # Add outbound calls to the messages array
+        for call in calls:
+            # Add system message about the call; call_time is naive local time
+            timestamp = call_transcripts.to_utc_iso(call.get('call_time'))
+            formatted_time = (datetime.fromisoformat(call['call_time']).strftime("%Y-%m-%d %H:%M:%S")
+                              if timestamp else "unknown time")
+
+            status_text = CALL_STATUS_TEXT.get(call.get('status'), call.get('status'))
+
+            # Add call status to messages
+            messages.append({
+                "id": f"call_{call.get('call_id')}",
+                "message": f"{status_text} at {formatted_time}",
+                "sender": "system",
+                "timestamp": timestamp
+            })
+
+            # Add feedback content if the call has feedback
+            if call.get('feedback'):
+                messages.append({
+                    "id": f"feedback_{call.get('call_id')}",
+                    "message": f"Feedback shared: \"{call.get('feedback')}\"",
+                    "sender": "assistant",
+                    "timestamp": timestamp
+                })
+
+        # Sort messages by timestamp; all of them are UTC "...Z" strings
+        messages.sort(key=call_transcripts.timestamp_sort_key)
+
+        return jsonify({
+            "callHistory": messages
+        }), 200
+
+    except Exception as e:
+        print(f"Error getting call history: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def init_app(app, mongo):
+    """
+    Register the feedback call routes on a Flask app. Routes the app already
+    has are skipped, so main.py and customer_outbound_calls.py can both call
+    this on the same app.
+
+    Args:
+        app: The Flask app
+        mongo: The app's PyMongo instance
+    """
+    routes = [
+        ('/SendCustomerFeedback', 'send_customer_feedback', ['POST'],
+         lambda: send_customer_feedback(mongo.db)),
+        ('/callJobs/<job_id>', 'get_call_job', ['GET'],
+         lambda job_id: get_call_job(mongo.db, job_id)),
+        ('/getCallHistory/<policy_number>', 'get_call_history', ['GET'],
+         lambda policy_number: get_call_history(mongo.db, policy_number)),
+    ]
+    for rule, endpoint, methods, view in routes:
+        if endpoint not in app.view_functions:
+            app.add_url_rule(rule, endpoint, view, methods=methods)
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+'''
+Idempotency keys for requests that place phone calls.
+
+The first request with a key reserves it in `idempotency_keys` and records
+the result (the call job it queued). A repeat of the same request with the
+same key gets that result back instead of queuing another call. Keys come from
+the Idempotency-Key header, or are derived from the request body when the
+client sends none; derived keys expire sooner so the same message can be
+sent again on purpose later. A TTL index removes expired keys.
+
+A reservation still without a result after RESERVATION_TIMEOUT seconds
+belongs to a request whose process died, so the next request with the key
+takes it over instead of getting 409 until the key expires.
+'''
+
+KEYS_COLLECTION = "idempotency_keys"
+KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 3600))
+DERIVED_KEY_TTL = int(os.environ.get('IDEMPOTENCY_DERIVED_KEY_TTL', 600))
+MAX_KEY_LENGTH = 255
+# Seconds before an in-flight reservation is treated as abandoned
+RESERVATION_TIMEOUT = int(os.environ.get('IDEMPOTENCY_RESERVATION_TIMEOUT', 30))
+
+
+class KeyConflict(Exception):
+    """
+    The key was used before with a different request body.
+    """
+
+
+class KeyInUse(Exception):
+    """
+    Another request with the key is being handled right now.
+    """
+
+
+def ensure_indexes(db):
+    db[KEYS_COLLECTION].create_index(
+        [("expires_at", ASCENDING)],
+        name="expires_at_ttl",
+        expireAfterSeconds=0
+    )
+
+
+def request_hash(body):
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def resolve_key(scope, header_key, body):
+    """
+    Pick the key for a request.
+
+    Args:
+        scope (str): The endpoint, so keys never collide across endpoints
+        header_key (str): The Idempotency-Key header, if any
+        body (dict): The request body, used to derive a key without a header
+
+    Returns:
+        tuple: (key, ttl in seconds)
+    """
+    if header_key:
+        if len(header_key) > MAX_KEY_LENGTH:
+            raise ValueError(f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+        return f"{scope}:{header_key}", KEY_TTL
+    return f"{scope}:derived:{request_hash(body)}", DERIVED_KEY_TTL
+
+
+def reserve(db, key, body, ttl):
+    """
+    Claim a key for a new request.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        key (str): From resolve_key
+        body (dict): The request body
+        ttl (int): Seconds the key stays reserved
+
+    Returns:
+        dict: None if the key is new (or abandoned) and now reserved;
+        otherwise the stored record, whose `result` is None while the first
+        request is in flight
+
+    Raises:
+        KeyConflict: The key was used with a different request body
+        KeyInUse: Other requests kept racing for the key
+    """
+    digest = request_hash(body)
+    now = datetime.now(timezone.utc)
+    for _ in range(3):
+        try:
+            db[KEYS_COLLECTION].insert_one({
+                "_id": key,
+                "request_hash": digest,
+                "result": None,
+                "created_at": now,
+                "reserved_at": now,
+                "expires_at": now + timedelta(seconds=ttl),
+            })
+            return None
+        except DuplicateKeyError:
+            existing = db[KEYS_COLLECTION].find_one({"_id": key})
+            if existing is None:
+                continue
+            # The TTL monitor only runs once a minute
+            if existing["expires_at"].replace(tzinfo=timezone.utc) <= now:
+                db[KEYS_COLLECTION].delete_one({"_id": key, "expires_at": existing["expires_at"]})
+                continue
+            if existing["request_hash"] != digest:
+                raise KeyConflict("Idempotency-Key was already used with a different request")
+            reserved_at = existing.get("reserved_at") or existing["created_at"]
+            if (existing["result"] is None
+                    and reserved_at.replace(tzinfo=timezone.utc) <= now - timedelta(seconds=RESERVATION_TIMEOUT)):
+                # Take over an abandoned reservation, unless another request just did
+                taken = db[KEYS_COLLECTION].update_one(
+                    {"_id": key, "result": None, "reserved_at": existing.get("reserved_at")},
+                    {"$set": {"reserved_at": now}}
+                )
+                if taken.modified_count:
+                    return None
+                continue
+            return existing
+    raise KeyInUse("Idempotency-Key is being reused concurrently")
+
+
+def complete(db, key, result):
+    """
+    Store the result of the request that reserved a key.
+    """
+    db[KEYS_COLLECTION].update_one({"_id": key}, {"$set": {"result": result}})
+
+
+def release(db, key):
+    """
+    Drop a reservation whose request failed, so a retry can run it.
+    """
+    db[KEYS_COLLECTION].delete_one({"_id": key, "result": None})
@@ -1,21 +1,37 @@
 from flask import Flask,jsonify,request             #pip install flask
+from flask import Response, stream_with_context
 from flask_cors import CORS                         #pip install flask-cors
 from flask_pymongo import PyMongo                   #pip install flask-pymongo
 #pip install flask-jwt-extended
+from bson import ObjectId
+from bson.errors import InvalidId
 from dotenv import load_dotenv
 import os
-import vapi_get_first_call as vgc
+import json
+import vapi_client
+import call_store
+import policy_cache
+import call_ingest
+import vapi_sync
+import status_refresher
+import call_events
+import db_indexes
+import client_fields
+import chat_messages
+import repositories as repo
+import client_import
+import data_export
+import dashboard_stats
+import call_search
+import call_transcripts
+import call_jobs
+import feedback_calls
 
 app = Flask(__name__)
 CORS(app)
 
 load_dotenv()
-auth_token = os.environ.get('VITE_VAPI_API_KEY')
 assistant_id = os.environ.get('VITE_ASSISTANT_ID')
-headers = {
-    'Authorization': f'Bearer {auth_token}',
-    'Content-Type': 'application/json',
-}
 
 uri = os.getenv("uri")
 
@@ -30,6 +46,40 @@ try:
 except:
     print("Failed to connect to MongoDB")
 
+try:
+    db_indexes.ensure_indexes(mongo.db)
+    if os.environ.get('VERIFY_QUERY_PLANS'):
+        db_indexes.verify_query_plans(mongo.db)
+except Exception as e:
+    print(f"Failed to create indexes: {str(e)}")
+
+
+def start_background_workers():
+    """
+    Start the threads only the serving app runs. Scripts that import main for
+    `mongo` must not start them: the call job workers dial customers.
+    """
+    call_ingest.start_worker(mongo.db)
+
+    # Outbound call job workers; set CALL_JOB_WORKERS=0 when running call_jobs.py separately
+    call_jobs.start_workers(mongo.db, int(os.environ.get('CALL_JOB_WORKERS', 1)))
+
+    # Refresh open call records in the background when an interval is configured
+    if os.environ.get('STATUS_REFRESH_INTERVAL'):
+        status_refresher.start_scheduler(mongo.db, float(os.environ['STATUS_REFRESH_INTERVAL']))
+
+
+_workers_started = False
+
+
+@app.before_request
+def ensure_background_workers():
+    # Covers `flask run` and WSGI servers, which never run the __main__ block
+    global _workers_started
+    if not _workers_started:
+        _workers_started = True
+        start_background_workers()
+
 
 def check_call_status(call_id):
     """
@@ -42,7 +92,7 @@ def check_call_status(call_id):
         str: Status of the call, or None if failed to retrieve status
     """
     try:
-        response = requests.get(f'https://api.vapi.ai/call/{call_id}', headers=headers)
+        response = vapi_client.get(f'/call/{call_id}', endpoint='call.get')
         
         if response.status_code == 200:
             call_data = response.json()
@@ -50,10 +100,7 @@ def check_call_status(call_id):
             print(f"Call {call_id} status: {status}")
             
             # Update the call record in the database
-            mongo.db.call_records.update_one(
-                {"call_id": call_id},
-                {"$set": {"status": status, "last_checked": datetime.now().isoformat()}}
-            )
+            repo.update_call_status(mongo.db, call_id, status)
             
             return status
         else:
@@ -78,14 +125,10 @@ def SignUpEmployee():
         email = data["email"]
         password = data["password"]  
 
-        # Check if user already exists
-        existing_user = mongo.db.users.find_one({"email": email})
-        if existing_user:
+        # Insert user into the database; the unique email index rejects duplicates
+        if not repo.create_user(mongo.db, {"email": email, "password": password}):
             return jsonify({"error": "User already exists"}), 400
 
-        # Insert user into the database
-        mongo.db.users.insert_one({"email": email, "password": password})
-
         return jsonify({"message": "User registered successfully"}), 201
 
     except Exception as e:
@@ -108,7 +151,7 @@ def LoginEmployee():
         password = data["password"]
 
         # Find user by email
-        user = mongo.db.users.find_one({"email": email})
+        user = repo.find_user_by_email(mongo.db, email, {"_id": 0, "password": 1})
 
         if not user or user["password"] != password:
             return jsonify({"error": "Invalid email or password"}), 401
@@ -125,14 +168,55 @@ def LoginEmployee():
 
 @app.route('/getcall/<id>',methods=['POST','GET'])
 def get_call(id):
-    data = vgc.get_last_call(id)
+    version = policy_cache.version(mongo.db, id)
+    data = policy_cache.get(id, "summary", version)
+    if policy_cache.is_miss(data):
+        call = call_store.find_latest_call(mongo.db, id, {"summary": 1})
+        if not call:
+            data = json.dumps("No records matching policy number found")
+        else:
+            data = json.dumps((call.get('summary') or '').strip('\n'))
+        policy_cache.put(id, "summary", version, data)
     return jsonify(data)
 
 @app.route('/getchatlogs/<id>',methods=['POST','GET'])
 def get_chatlogs(id):
-    data = vgc.get_chat_records(id)
+    version = policy_cache.version(mongo.db, id)
+    data = policy_cache.get(id, "transcript", version)
+    if policy_cache.is_miss(data):
+        call = call_store.find_latest_call(mongo.db, id, {"_id": 1})
+        if not call:
+            data = json.dumps("No records matching policy number found")
+        else:
+            data = json.dumps(call_transcripts.call_messages(mongo.db, call["_id"]))
+        policy_cache.put(id, "transcript", version, data)
     return data
 
+@app.route('/calls/<call_id>/events',methods=['GET'])
+def call_status_events(call_id):
+    '''
+    Server-Sent Events stream of status transitions for one call.
+    Sends the stored status first and closes after a terminal status, when
+    the call has no record, or after call_events.MAX_STREAM_SECONDS (the
+    browser then reconnects).
+    '''
+    return Response(
+        stream_with_context(call_events.stream(mongo.db, call_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/cache/stats',methods=['GET'])
+def cache_stats():
+    return jsonify(policy_cache.stats()), 200
+
+@app.route('/sync/status',methods=['GET'])
+def sync_status():
+    try:
+        return jsonify(vapi_sync.get_lag(mongo.db)), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to read sync status: {str(e)}"}), 500
+
 
 '''
 Below is the code for the user signup and confirmation for the clients.
@@ -173,13 +257,8 @@ def SignUpClient():
         chatlog = data.get("chatlog", "")
         summary = data.get("summary", "")
 
-        # Check if policy number exists
-        existing_policy = mongo.db.clients.find_one({"policy_number": policy_number})
-        if existing_policy:
-            return jsonify({"error": "Policy number already exists"}), 400
-
-        # Insert user into the database
-        mongo.db.clients.insert_one({
+        # Insert user into the database; the unique policy_number index rejects duplicates
+        created = repo.create_client(mongo.db, {
             "name": name,
             "dob": dob,
             "policy_number": policy_number,
@@ -191,6 +270,8 @@ def SignUpClient():
             "chatlog": chatlog,
             "summary": summary
         })
+        if not created:
+            return jsonify({"error": "Policy number already exists"}), 400
 
         return jsonify({"message": "User registered successfully"}), 201
 
@@ -198,6 +279,93 @@ def SignUpClient():
         return jsonify({"error": f"Signup failed: {str(e)}"}), 500
     
 
+@app.route("/ImportClients", methods=["POST"])
+def ImportClients():
+    '''
+    Sample Request:
+    POST /ImportClients?format=csv&upsert=true
+    Body: the CSV (header row required) or NDJSON file
+
+    format defaults from the Content-Type (text/csv, otherwise NDJSON).
+    '''
+    try:
+        fmt = request.args.get("format")
+        if not fmt:
+            fmt = "csv" if request.mimetype == "text/csv" else "ndjson"
+        if fmt not in ("csv", "ndjson"):
+            return jsonify({"error": "format must be csv or ndjson"}), 400
+        upsert = request.args.get("upsert", "false").lower() == "true"
+
+        report = client_import.import_stream(mongo.db, request.stream, fmt, upsert)
+
+        return jsonify(report), 200
+
+    except Exception as e:
+        return jsonify({"error": f"Import failed: {str(e)}"}), 500
+
+
+@app.route("/search/calls", methods=["GET"])
+def SearchCalls():
+    '''
+    Sample Request:
+    GET /search/calls?q="policy renewal" adjuster renew*&page=1&per_page=20
+
+    Searches stored transcripts and summaries. policy_number is optional.
+    '''
+    try:
+        q = request.args.get("q", "")
+        page = request.args.get("page", default=1, type=int)
+        per_page = request.args.get("per_page", default=20, type=int)
+        policy_number = request.args.get("policy_number")
+
+        results = call_search.search(
+            mongo.db, call_store.CALLS_COLLECTION, q, page, per_page, policy_number)
+
+        return jsonify(results), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": f"Search failed: {str(e)}"}), 500
+
+
+@app.route("/dashboard/stats", methods=["GET"])
+def DashboardStats():
+    '''
+    Client counts by status, day and weekday plus call outcome counts,
+    aggregated in Mongo for the dashboard charts.
+    '''
+    try:
+        return jsonify(dashboard_stats.dashboard_stats(mongo.db)), 200
+
+    except Exception as e:
+        return jsonify({"error": f"Failed to compute dashboard stats: {str(e)}"}), 500
+
+
+@app.route("/export/<dataset>", methods=["GET"])
+def ExportData(dataset):
+    '''
+    Sample Request:
+    GET /export/clients?updated_since=2025-03-01&gzip=true
+
+    dataset is clients, call_records or transcripts. The response is NDJSON,
+    one document per line, streamed straight from the cursor.
+    '''
+    if dataset not in data_export.DATASETS:
+        return jsonify({"error": f"dataset must be one of: {', '.join(data_export.DATASETS)}"}), 404
+
+    updated_since = request.args.get("updated_since")
+    gzip = request.args.get("gzip", "false").lower() == "true"
+    filename = f"{dataset}.ndjson" + (".gz" if gzip else "")
+
+    return Response(
+        stream_with_context(data_export.export_stream(mongo.db, dataset, updated_since, gzip)),
+        mimetype="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
 @app.route("/UpdateClientStatus", methods=["POST"])
 def UpdateClientStatus():
     '''
@@ -213,17 +381,9 @@ def UpdateClientStatus():
         if not policy_number:
             return jsonify({"error": "Policy number is required"}), 400
 
-        # Find the user by policy number
-        existing_user = mongo.db.clients.find_one({"policy_number": policy_number})
-
-        if not existing_user:
-            return jsonify({"error": "User with this policy number does not exist"}), 404
-
         # Update user's status to "incomplete"
-        mongo.db.clients.update_one(
-            {"policy_number": policy_number},
-            {"$set": {"status": "incomplete"}}
-        )
+        if not repo.update_client(mongo.db, policy_number, {"status": "incomplete"}):
+            return jsonify({"error": "User with this policy number does not exist"}), 404
 
         return jsonify({"message": "Status updated to 'incomplete' successfully"}), 200
 
@@ -231,20 +391,54 @@ def UpdateClientStatus():
         return jsonify({"error": f"Failed to update status: {str(e)}"}), 500
     
 
+# Large text fields left out of client listings
+CLIENT_LIST_PROJECTION = {"password": 0, "chatlog": 0, "summary": 0}
+CLIENT_PAGE_MAX = 1000
+
 @app.route("/GetAllClients", methods=["GET"])
 def GetAllClients():
-    try:
-        # Query for all users (excluding password field for security)
-        users = mongo.db.clients.find({}, {"password": 0})  
-
-        # Convert MongoDB cursor to a list of dictionaries
-        users_list = list(users)
-
-        # Convert ObjectId to string for JSON serialization
-        for user in users_list:
-            user["_id"] = str(user["_id"])
+    '''
+    Sample Request:
+    GET /GetAllClients?limit=100&after=65f0c2...&fields=list
 
-        return jsonify({"users": users_list}), 200
+    limit, after and fields are optional. Without limit every client is returned.
+    Pass the returned next_after as after to get the next page.
+    '''
+    try:
+        limit = request.args.get("limit", type=int)
+        after = request.args.get("after")
+        projection = client_fields.projection(request.args.get("fields"), CLIENT_LIST_PROJECTION)
+
+        query = {}
+        if after:
+            query["_id"] = {"$gt": ObjectId(after)}
+        if limit is not None and not 0 < limit <= CLIENT_PAGE_MAX:
+            return jsonify({"error": f"limit must be between 1 and {CLIENT_PAGE_MAX}"}), 400
+
+        # Keyset pagination on _id; the default _id index serves the sort
+        users = mongo.db.clients.find(query, projection).sort("_id", 1).batch_size(500)
+        if limit:
+            users = users.limit(limit)
+
+        def generate():
+            # Stream one client at a time so memory stays flat
+            last_id = None
+            count = 0
+            yield '{"users": ['
+            for user in users:
+                last_id = user["_id"] = str(user["_id"])
+                yield ("," if count else "") + json.dumps(user, default=str)
+                count += 1
+            next_after = last_id if limit and count == limit else None
+            yield '], "next_after": ' + json.dumps(next_after) + '}'
+
+        return Response(stream_with_context(generate()), status=200, mimetype="application/json")
+
+    except InvalidId:
+        return jsonify({"error": "after must be a client _id"}), 400
+
+    except client_fields.InvalidFields as e:
+        return jsonify({"error": str(e)}), 400
 
     except Exception as e:
         return jsonify({"error": f"Failed to retrieve users: {str(e)}"}), 500
@@ -261,13 +455,13 @@ def confirmUser():
     try:
         data = request.json
         policy_number = str(data.get("policy_number"))
+        fields = request.args.get("fields") or data.get("fields")
+        projection = {**client_fields.projection(fields, {}), "_id": 0}
 
         # Check if user exists based on policy number only
-        existing_user = mongo.db.clients.find_one({"policy_number": policy_number})
+        existing_user = repo.find_client(mongo.db, policy_number, projection)
 
         if existing_user:
-            # Remove sensitive information
-            del existing_user['_id']
             return jsonify({
                 "message": "Policy found",
                 "has_active_policy": True,
@@ -279,6 +473,9 @@ def confirmUser():
             "has_active_policy": False
         }), 404
 
+    except client_fields.InvalidFields as e:
+        return jsonify({"error": str(e)}), 400
+
     except Exception as e:
         return jsonify({"error": f"Policy confirmation failed: {str(e)}"}), 500
 
@@ -307,46 +504,48 @@ def profile(email):
 
 '''
 
-# setting up placeholder for webhooks from vapi api calls 
-# to get data from calls
+# Webhook for Vapi server messages. Messages are acknowledged right away and
+# persisted by the call_ingest worker.
 @app.route("/callhook",methods = ['POST','GET'])
 def callHook():
-    data = None
-    return jsonify(data)
-
-if __name__ == "__main__":
-    app.run(port=5000, debug=True)
-    
-
-
-'''
-Run Server:
-flask --app app run
-flask --app app run --port=5000 --debug5
-
-Python main.py
-Python3 main.py 
-
-'''
+    '''
+    Sample Request:
+    {
+        "message": {
+            "type": "end-of-call-report",
+            "call": {"id": "..."},
+            "artifact": {"transcript": "...", "messages": [...]},
+            "analysis": {"summary": "..."}
+        }
+    }
+    '''
+    data = request.get_json(silent=True) or {}
+    message = data.get("message")
+    if not isinstance(message, dict):
+        return jsonify({"error": "Vapi message is required"}), 400
 
+    queued = call_ingest.enqueue(message)
+    return jsonify({"received": True, "queued": queued}), 200
 
 @app.route("/GetClientByPolicyNumber", methods=["POST"])
 def GetClientByPolicyNumber():
     """
     Sample Request:
     {
-        "policy_number": "12345678"
+        "policy_number": "12345678",
+        "fields": "detail"   // optional, also accepted as ?fields=
     }
     """
     try:
         data = request.json
         policy_number = data.get("policy_number")
+        fields = request.args.get("fields") or data.get("fields")
 
         if not policy_number:
             return jsonify({"error": "Policy number is required"}), 400
 
         # Find the client by policy number
-        client = mongo.db.clients.find_one({"policy_number": policy_number})
+        client = repo.find_client(mongo.db, policy_number, client_fields.projection(fields, None))
 
         if not client:
             return jsonify({"error": "Client not found"}), 404
@@ -356,6 +555,9 @@ def GetClientByPolicyNumber():
 
         return jsonify({"client": client}), 200
 
+    except client_fields.InvalidFields as e:
+        return jsonify({"error": str(e)}), 400
+
     except Exception as e:
         return jsonify({"error": f"Failed to retrieve client: {str(e)}"}), 500
 
@@ -376,17 +578,9 @@ def UpdateClientSummary():
         if not policy_number:
             return jsonify({"error": "Policy number is required"}), 400
 
-        # Find the client by policy number
-        client = mongo.db.clients.find_one({"policy_number": policy_number})
-
-        if not client:
-            return jsonify({"error": "Client not found"}), 404
-
         # Update client's summary
-        mongo.db.clients.update_one(
-            {"policy_number": policy_number},
-            {"$set": {"summary": summary}}
-        )
+        if not repo.update_client(mongo.db, policy_number, {"summary": summary}):
+            return jsonify({"error": "Client not found"}), 404
 
         return jsonify({"message": "Summary updated successfully"}), 200
 
@@ -412,237 +606,54 @@ def UpdateClientChatlog():
         if not all([policy_number, message, sender]):
             return jsonify({"error": "Policy number, message, and sender are required"}), 400
 
-        # Find the client by policy number
-        client = mongo.db.clients.find_one({"policy_number": policy_number})
+        # Append the message as its own document
+        new_message = chat_messages.append_message(mongo.db, policy_number, message, sender)
 
-        if not client:
+        if not new_message:
             return jsonify({"error": "Client not found"}), 404
 
-        # Get existing chatlog or initialize new one
-        try:
-            chatlog =vgc.get_chat_records(policy_number)
-        except json.JSONDecodeError:
-            chatlog = []
-
-        # Add new message
-        new_message = {
-            "id": len(chatlog) + 1,
-            "message": message,
-            "sender": sender,
-            "timestamp": datetime.now().isoformat()
-        }
-        chatlog.append(new_message)
-
-        # Update client's chatlog
-        mongo.db.clients.update_one(
-            {"policy_number": policy_number},
-            {"$set": {"chatlog": json.dumps(chatlog)}}
-        )
-
-        return jsonify({"message": "Chatlog updated successfully", "chatlog": chatlog}), 200
+        return jsonify({"message": "Chatlog updated successfully", "chat_message": new_message}), 200
 
     except Exception as e:
         return jsonify({"error": f"Failed to update chatlog: {str(e)}"}), 500
 
-def make_outbound_call(customer, feedback=None):
+@app.route("/getChatMessages/<policy_number>", methods=["GET"])
+def GetChatMessages(policy_number):
     """
-    Make an outbound call to a customer using the pre-configured Vapi.ai assistant
-    
-    Args:
-        customer (dict): Customer information including name, phone, policy_number, etc.
-        feedback (str, optional): Employee feedback to share with the customer.
-        
-    Returns:
-        str: Call ID if call was created successfully, None otherwise.
+    Sample Request:
+    GET /getChatMessages/12345678?after=20&limit=50
+
+    after and limit are optional. Returns messages in order, oldest first.
     """
-    
-    # Create the data payload for the API request
-    data = {
-        'assistant': assistant_id,  # Use the pre-configured assistant ID
-        'phoneNumberId': customer.get('phone'),
-        'customer': {
-            'number': customer.get('phone'),
-        },
-        'variables': {
-            'customer_name': customer.get('name', 'Customer'),
-            'policy_number': customer.get('policy_number', 'Unknown'),
-            'employee_feedback': feedback or '',
-            'is_followup': 'true',
-            'offer_appointment': 'true'
-        }
-    }
-    
-    # Log the outbound call attempt
-    print(f"Attempting to call {customer.get('name')} at {customer.get('phone')}")
-    if feedback:
-        print(f"With feedback: {feedback}")
-    
     try:
-        # Make the POST request to Vapi to create the phone call
-        response = requests.post(
-            'https://api.vapi.ai/call/phone', headers=headers, json=data)
-        
-        # Check if the request was successful
-        if response.status_code == 201:
-            call_data = response.json()
-            call_id = call_data.get('id')
-            print(f'Call created successfully with ID: {call_id}')
-            
-            # Record in database that we made this call
-            call_record = {
-                "call_id": call_id,
-                "policy_number": customer.get('policy_number'),
-                "call_time": datetime.now().isoformat(),
-                "status": "initiated",
-                "feedback": feedback
-            }
-            
-            mongo.db.call_records.insert_one(call_record)
-            print("Call record added to database")
-            
-            return call_id
-        else:
-            print('Failed to create call:')
-            print(response.text)
-            return None
-    except Exception as e:
-        print(f"Error making outbound call: {str(e)}")
-        return None
+        after = request.args.get("after", default=0, type=int)
+        limit = request.args.get("limit", type=int)
 
-# Flask routes for the API
-@app.route('/SendCustomerFeedback', methods=['POST'])
-def send_customer_feedback():
-    """API endpoint to send feedback to a customer via outbound call"""
-    try:
-        data = request.json
-        policy_number = data.get('policy_number')
-        feedback = data.get('feedback')
-        
-        if not policy_number or not feedback:
-            return jsonify({"error": "Policy number and feedback are required"}), 400
-            
-        # Get customer data from database
-        customer_data = mongo.db.users.find_one({"policy_number": policy_number})
-        
-        if not customer_data:
-            return jsonify({"error": "Customer not found"}), 404
-            
-        # Create customer object for the outbound call
-        customer = {
-            "name": customer_data.get('name', 'Customer'),
-            "phone": customer_data.get('phone'),
-            "policy_number": policy_number,
-            "email": customer_data.get('email'),
-            "status": customer_data.get('status', 'active')
-        }
-        
-        # Validate phone number
-        if not customer.get('phone') or not customer['phone'].startswith('+'):
-            return jsonify({"error": "Valid phone number with country code is required"}), 400
-            
-        # Make the outbound call with the feedback
-        call_id = make_outbound_call(customer, feedback)
-        
-        if call_id:
-            # Store the feedback in the database
-            mongo.db.users.update_one(
-                {"policy_number": policy_number},
-                {"$set": {"last_feedback": feedback, "last_feedback_date": datetime.now().isoformat()}}
-            )
-            
-            return jsonify({
-                "success": True,
-                "message": "Feedback sent and outbound call initiated",
-                "call_id": call_id
-            }), 200
-        else:
-            return jsonify({
-                "error": "Failed to initiate outbound call"
-            }), 500
-            
-    except Exception as e:
-        print(f"Error in send_customer_feedback: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        messages = chat_messages.get_messages(mongo.db, policy_number, after, limit)
+
+        return jsonify({"messages": messages}), 200
 
-@app.route('/getCallHistory/<policy_number>', methods=['GET'])
-def get_call_history(policy_number):
-    """API endpoint to get call history for a customer"""
-    try:
-        # Get the user's chatlog
-        user = mongo.db.users.find_one({"policy_number": policy_number})
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-        
-        # Process the user's chatlog
-        chatlog = user.get('chatlog', '')
-        messages = []
-        
-        if chatlog:
-            # Parse the chatlog
-            lines = chatlog.split('\n')
-            for i, line in enumerate(lines):
-                if line.strip():
-                    if line.startswith('AI:'):
-                        messages.append({
-                            "id": i + 1,
-                            "message": line[3:].strip(),
-                            "sender": "assistant",
-                            "timestamp": datetime.now().isoformat()
-                        })
-                    elif line.startswith('User:'):
-                        messages.append({
-                            "id": i + 1,
-                            "message": line[5:].strip(),
-                            "sender": "client",
-                            "timestamp": datetime.now().isoformat()
-                        })
-        
-        # Get recent outbound calls for this policy number
-        calls = list(mongo.db.call_records.find(
-            {"policy_number": policy_number},
-            {"_id": 0, "call_id": 1, "call_time": 1, "status": 1, "feedback": 1}
-        ).sort("call_time", -1).limit(10))
-        
-        # Add outbound calls to the messages array
-        for call in calls:
-            # Add system message about the call
-            call_time = datetime.fromisoformat(call.get('call_time'))
-            formatted_time = call_time.strftime("%Y-%m-%d %H:%M:%S")
-            
-            status_text = {
-                "initiated": "Call initiated",
-                "ringing": "Calling customer",
-                "in-progress": "In call with customer",
-                "completed": "Call completed successfully",
-                "failed": "Call failed to connect",
-                "canceled": "Call was canceled",
-                "ended": "Call ended"
-            }.get(call.get('status'), call.get('status'))
-            
-            # Add call status to messages
-            messages.append({
-                "id": f"call_{call.get('call_id')}",
-                "message": f"{status_text} at {formatted_time}",
-                "sender": "system",
-                "timestamp": call.get('call_time')
-            })
-            
-            # Add feedback content if the call has feedback
-            if call.get('feedback'):
-                messages.append({
-                    "id": f"feedback_{call.get('call_id')}",
-                    "message": f"Feedback shared: \"{call.get('feedback')}\"",
-                    "sender": "assistant",
-                    "timestamp": call.get('call_time')
-                })
-        
-        # Sort messages by timestamp
-        messages.sort(key=lambda x: x.get('timestamp', ''))
-        
-        return jsonify({
-            "callHistory": messages
-        }), 200
-            
     except Exception as e:
-        print(f"Error getting call history: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return jsonify({"error": f"Failed to retrieve chat messages: {str(e)}"}), 500
+
+# /SendCustomerFeedback, /callJobs/<job_id> and /getCallHistory/<policy_number>
+feedback_calls.init_app(app, mongo)
+
+if __name__ == "__main__":
+    # With the reloader on, only the child process that serves requests starts them
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        _workers_started = True
+        start_background_workers()
+    app.run(port=5000, debug=True)
+    
+
+
+'''
+Run Server:
+flask --app app run
+flask --app app run --port=5000 --debug5
+
+Python main.py
+Python3 main.py 
+
+'''
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from pymongo import UpdateOne
+
+'''
+In-process cache for per-policy call reads (/getcall and /getchatlogs).
+
+Entries are keyed by (policy_number, kind, version), expire after a TTL and
+are evicted least-recently-used once the cache is full. The version is a
+per-policy counter in the `policy_cache_versions` collection, read with one
+_id lookup per request. Writers in any process (the Flask app, vapi_sync.py)
+bump it when new call data for the policy is stored, so every process stops
+using its old entries at once instead of serving them until the TTL.
+
+Config:
+CALL_CACHE_SIZE - maximum number of entries (default 1024)
+CALL_CACHE_TTL  - seconds an entry stays valid (default 60)
+'''
+
+VERSIONS_COLLECTION = "policy_cache_versions"
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] < time.monotonic():
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+call_cache = TTLCache(
+    maxsize=int(os.environ.get('CALL_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('CALL_CACHE_TTL', 60))
+)
+
+
+def version(db, policy_number):
+    """
+    The policy's current cache version. Read it before loading the data to
+    cache, so a write that lands in between leaves the entry already stale.
+    """
+    doc = db[VERSIONS_COLLECTION].find_one({"_id": policy_number.strip()}, {"version": 1})
+    return doc["version"] if doc else 0
+
+
+def get(policy_number, kind, version):
+    return call_cache.get((policy_number.strip(), kind, version), _MISSING)
+
+
+def put(policy_number, kind, version, value):
+    call_cache.set((policy_number.strip(), kind, version), value)
+
+
+def invalidate(db, policy_numbers):
+    """
+    Make every process's cached entries for these policy numbers stale.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        policy_numbers: Iterable of policy numbers
+    """
+    numbers = {number.strip() for number in policy_numbers if number}
+    if not numbers:
+        return
+    db[VERSIONS_COLLECTION].bulk_write(
+        [UpdateOne({"_id": number}, {"$inc": {"version": 1}}, upsert=True) for number in numbers],
+        ordered=False
+    )
+
+
+def is_miss(value):
+    return value is _MISSING
+
+
+def stats():
+    return call_cache.stats()
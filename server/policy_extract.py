@@ -0,0 +1,100 @@
+import re
+import json
+
+'''
+Policy number extraction shared by every module that reads Vapi calls.
+
+The transcript fallback scans the text once with a single precompiled
+pattern covering every phrasing we look for, and understands numbers read
+out as words ("one two three four ...") as well as digits. A match needs at
+least MIN_DIGITS digits, so a spoken word on its own ("my policy is, oh, let
+me check") is not taken for a policy number.
+'''
+
+SPOKEN_DIGITS = {
+    'zero': '0', 'oh': '0', 'one': '1', 'two': '2', 'three': '3', 'four': '4',
+    'five': '5', 'six': '6', 'seven': '7', 'eight': '8', 'nine': '9',
+}
+
+# Shortest policy number we accept, so a stray "one" or "oh" is not a match
+MIN_DIGITS = 6
+
+_DIGIT = r"(?:[0-9]|(?:" + "|".join(SPOKEN_DIGITS) + r")\b)"
+# Spaces, commas and dashes join digits; a period only when no space follows,
+# so "12345678. 5 stars" stops at the end of the sentence
+_SEPARATOR = r"(?:[\s,-]|\.(?!\s|$))*"
+
+# Matches e.g. "Insurance number is 1 2 3 4 5 6", "policy number one two
+# three four five six", "my policy is 12345678"
+POLICY_PATTERN = re.compile(
+    r"(?:(?:insurance|policy)\s+number(?:\s+is)?|my\s+(?:number|policy)\s+is)[\s:,]+"
+    r"(" + _DIGIT + r"(?:" + _SEPARATOR + _DIGIT + r"){" + str(MIN_DIGITS - 1) + r",})",
+    re.IGNORECASE
+)
+DIGIT_TOKEN = re.compile(r"[0-9]|[a-z]+", re.IGNORECASE)
+
+
+def normalize_digits(text):
+    """
+    Turn a run of digits and spoken digits into a plain digit string.
+    """
+    return "".join(
+        token if token.isdigit() else SPOKEN_DIGITS.get(token.lower(), '')
+        for token in DIGIT_TOKEN.findall(text)
+    )
+
+
+def policy_number_from_transcript(transcript):
+    """
+    Find the first policy number mentioned in a transcript.
+
+    Returns:
+        str: The policy number, or None if none was mentioned
+    """
+    match = POLICY_PATTERN.search(transcript)
+    if match:
+        return normalize_digits(match.group(1))
+    return None
+
+
+def extract_policy_number(call_data, default="Unknown"):
+    """
+    Extract the insurance policy number from the call data.
+    This function checks multiple possible locations where the policy number might be stored.
+
+    Args:
+        call_data (dict): A Vapi call object
+        default: Value returned when no policy number is found
+
+    Returns:
+        str: The policy number, or `default`
+    """
+    # Method 1: Check in the structured data analysis if available
+    structured = (call_data.get('analysis') or {}).get('structuredData')
+    if structured:
+        policy_number = structured.get('policy_number')
+        if policy_number:
+            return str(policy_number)
+
+    # Method 2: Check in tool calls if available
+    for message in call_data.get('messages') or ():
+        if message.get('role') != 'tool_calls':
+            continue
+        for tool_call in message.get('toolCalls') or ():
+            function = tool_call.get('function') or {}
+            if tool_call.get('type') == 'function' and function.get('name') == 'confirmUser':
+                try:
+                    args = json.loads(function['arguments'])
+                except (KeyError, TypeError, json.JSONDecodeError):
+                    continue
+                if isinstance(args, dict) and args.get('policy_number'):
+                    return str(args['policy_number'])
+
+    # Method 3: Parse from transcript as fallback
+    transcript = call_data.get('transcript')
+    if transcript:
+        policy_number = policy_number_from_transcript(transcript)
+        if policy_number:
+            return policy_number
+
+    return default
@@ -0,0 +1,197 @@
+from datetime import datetime
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+'''
+Data access for clients, users and call_records.
+
+Every mutation is a single round trip: updates report whether a document
+matched instead of looking it up first, and inserts rely on the unique
+indexes from db_indexes and report a DuplicateKeyError as "already exists".
+If a unique index is missing (db_indexes could not build it over existing
+duplicates), inserts fall back to checking for an existing document first,
+so duplicates are never accepted silently.
+'''
+
+DUPLICATE_POLICY_NUMBER = "Policy number already exists"
+
+# (database, collection, field) with a unique index, cached once seen
+_unique_indexes = set()
+
+
+def _has_unique_index(collection, field):
+    key = (collection.database.name, collection.name, field)
+    if key in _unique_indexes:
+        return True
+    for index in collection.index_information().values():
+        if index.get("unique") and [name for name, _ in index["key"]] == [field]:
+            _unique_indexes.add(key)
+            return True
+    return False
+
+
+def _insert_unique(collection, field, document):
+    """
+    Insert a document unless one with the same `field` value exists.
+
+    Returns:
+        bool: False if a document with this value already exists
+    """
+    if not _has_unique_index(collection, field):
+        if collection.find_one({field: document[field]}, {"_id": 1}):
+            return False
+    try:
+        collection.insert_one(document)
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+# Clients
+
+def find_client(db, policy_number, projection=None):
+    return db.clients.find_one({"policy_number": policy_number}, projection)
+
+
+def create_client(db, client):
+    """
+    Insert a client.
+
+    Returns:
+        bool: False if a client with this policy number already exists
+    """
+    return _insert_unique(db.clients, "policy_number", {**client, "updated_at": datetime.now().isoformat()})
+
+
+def create_clients(db, clients):
+    """
+    Insert many clients with one unordered insert_many.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        clients (list): Complete client documents
+
+    Returns:
+        tuple: (number inserted, list of (index into clients, error message)
+        for the clients that were not inserted)
+    """
+    errors = []
+    positions = range(len(clients))
+    if not _has_unique_index(db.clients, "policy_number"):
+        # Without the index insert_many would accept duplicates, so drop
+        # clients whose policy number exists or repeats earlier in the batch
+        numbers = [client["policy_number"] for client in clients]
+        seen = {doc["policy_number"] for doc in db.clients.find({"policy_number": {"$in": numbers}}, {"policy_number": 1})}
+        positions = []
+        for index, number in enumerate(numbers):
+            if number in seen:
+                errors.append((index, DUPLICATE_POLICY_NUMBER))
+            else:
+                seen.add(number)
+                positions.append(index)
+    if not positions:
+        return 0, errors
+
+    try:
+        result = db.clients.insert_many([clients[index] for index in positions], ordered=False)
+        return len(result.inserted_ids), errors
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", ()):
+            message = DUPLICATE_POLICY_NUMBER if error.get("code") == 11000 else error.get("errmsg")
+            errors.append((positions[error["index"]], message))
+        return e.details.get("nInserted", 0), sorted(errors)
+
+
+def update_client(db, policy_number, fields):
+    """
+    Set fields on a client.
+
+    Returns:
+        bool: False if no client has this policy number
+    """
+    result = db.clients.update_one(
+        {"policy_number": policy_number},
+        {"$set": {**fields, "updated_at": datetime.now().isoformat()}}
+    )
+    return result.matched_count > 0
+
+
+def increment_client_counter(db, policy_number, field):
+    """
+    Atomically increment a counter on a client.
+
+    Returns:
+        int: The new counter value, or None if no client has this policy number
+    """
+    client = db.clients.find_one_and_update(
+        {"policy_number": policy_number},
+        {"$inc": {field: 1}},
+        projection={"_id": 0, field: 1},
+        return_document=ReturnDocument.AFTER
+    )
+    return client[field] if client else None
+
+
+# Users
+
+def find_user_by_email(db, email, projection=None):
+    return db.users.find_one({"email": email}, projection)
+
+
+def find_user_by_policy(db, policy_number, projection=None):
+    return db.users.find_one({"policy_number": policy_number}, projection)
+
+
+def create_user(db, user):
+    """
+    Insert a user.
+
+    Returns:
+        bool: False if a user with this email already exists
+    """
+    return _insert_unique(db.users, "email", user)
+
+
+def update_user_by_policy(db, policy_number, fields):
+    result = db.users.update_one({"policy_number": policy_number}, {"$set": fields})
+    return result.matched_count > 0
+
+
+# Call records
+
+def create_call_record(db, call_record):
+    """
+    Insert a call record.
+
+    Returns:
+        bool: False if a record for this call id already exists
+    """
+    return _insert_unique(db.call_records, "call_id", call_record)
+
+
+def update_call_status(db, call_id, status):
+    """
+    Set the status of a call record.
+
+    Returns:
+        bool: False if there is no record for this call id
+    """
+    result = db.call_records.update_one(
+        {"call_id": call_id},
+        {"$set": {"status": status, "last_checked": datetime.now().isoformat()}}
+    )
+    return result.matched_count > 0
+
+
+def recent_call_records(db, policy_number, limit=10, projection=None):
+    return list(db.call_records.find(
+        {"policy_number": policy_number},
+        projection
+    ).sort("call_time", DESCENDING).limit(limit))
+
+
+def latest_call_record(db, policy_number):
+    return db.call_records.find_one(
+        {"policy_number": policy_number},
+        sort=[("call_time", DESCENDING)]
+    )
@@ -0,0 +1,142 @@
+import os
+import argparse
+import threading
+import time
+from datetime import datetime
+from pymongo import ASCENDING, UpdateOne
+import vapi_async
+import call_events
+
+'''
+Periodic refresh of call_records that have not reached a terminal status.
+
+Each pass takes the open records checked least recently with one indexed
+query, fetches their current status from Vapi concurrently and writes the
+results back in a single bulk_write, so readers can take statuses straight
+from Mongo. Every checked record gets a new last_checked, so records that
+stay open rotate to the back of the queue instead of starving the rest, and
+a record whose status cannot be fetched MAX_REFRESH_FAILURES times in a row
+is no longer refreshed.
+
+Run:
+python status_refresher.py --once
+python status_refresher.py --interval 15
+
+Or set STATUS_REFRESH_INTERVAL (seconds) to run it inside the Flask app.
+'''
+
+TERMINAL_STATUSES = call_events.TERMINAL_STATUSES
+# Every non-terminal status a call record can be in
+ACTIVE_STATUSES = ("initiated", "queued", "scheduled", "ringing", "in-progress", "forwarding")
+
+BATCH_LIMIT = int(os.environ.get('STATUS_REFRESH_LIMIT', 500))
+CONCURRENCY = int(os.environ.get('STATUS_REFRESH_CONCURRENCY', 20))
+MAX_REFRESH_FAILURES = int(os.environ.get('STATUS_REFRESH_MAX_FAILURES', 10))
+
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def ensure_indexes(db):
+    db.call_records.create_index([("status", ASCENDING)], name="status")
+    db.call_records.create_index([("status", ASCENDING), ("last_checked", ASCENDING)], name="status_last_checked")
+
+
+def open_records(db, limit=BATCH_LIMIT):
+    """
+    The open call records checked least recently (never-checked ones first).
+    """
+    return db.call_records.find(
+        {
+            "status": {"$in": list(ACTIVE_STATUSES)},
+            "refresh_failures": {"$not": {"$gte": MAX_REFRESH_FAILURES}},
+        },
+        {"_id": 0, "call_id": 1, "status": 1}
+    ).sort("last_checked", ASCENDING).limit(limit)
+
+
+def refresh_once(db, limit=BATCH_LIMIT, concurrency=CONCURRENCY):
+    """
+    Refresh the status of every open call record.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        limit (int): Maximum records refreshed in one pass
+        concurrency (int): Maximum Vapi requests in flight
+
+    Returns:
+        dict: Number of records checked, changed and failed to fetch
+    """
+    records = list(open_records(db, limit))
+    current = {record["call_id"]: record.get("status") for record in records if record.get("call_id")}
+    if not current:
+        return {"checked": 0, "changed": 0, "failed": 0}
+
+    calls = vapi_async.get_calls(list(current), concurrency)
+
+    checked = datetime.now().isoformat()
+    changed = {}
+    ops = []
+    failed = 0
+    for call_id in current:
+        status = (calls.get(call_id) or {}).get('status')
+        if not status:
+            failed += 1
+            ops.append(UpdateOne({"call_id": call_id},
+                                 {"$set": {"last_checked": checked}, "$inc": {"refresh_failures": 1}}))
+            continue
+        update = {"last_checked": checked, "refresh_failures": 0}
+        if status != current[call_id]:
+            changed[call_id] = update["status"] = status
+        ops.append(UpdateOne({"call_id": call_id}, {"$set": update}))
+    db.call_records.bulk_write(ops, ordered=False)
+    for call_id, status in changed.items():
+        call_events.publish(call_id, status)
+
+    return {"checked": len(current), "changed": len(changed), "failed": failed}
+
+
+def _run(db, interval):
+    while True:
+        try:
+            result = refresh_once(db)
+            if result["checked"]:
+                print(f"Refreshed {result['checked']} open calls, {result['changed']} changed, "
+                      f"{result['failed']} failed")
+        except Exception as e:
+            print(f"Error refreshing call statuses: {str(e)}")
+        time.sleep(interval)
+
+
+def start_scheduler(db, interval):
+    """
+    Start the refresher in a background thread once per process.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        interval (float): Seconds between passes
+    """
+    global _thread
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, args=(db, interval), name="status-refresher", daemon=True)
+            _thread.start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ready Set Insure - call status refresher')
+    parser.add_argument('--once', action='store_true', help='Run a single refresh pass and exit')
+    parser.add_argument('--interval', type=float, default=15, help='Seconds between refresh passes')
+    args = parser.parse_args()
+
+    from main import mongo
+    ensure_indexes(mongo.db)
+
+    if args.once:
+        print(refresh_once(mongo.db))
+    else:
+        _run(mongo.db, args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import argparse
+import fcntl
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+'''
+Deduplicated, compressed archive for call transcripts.
+
+Transcripts are stored by content hash, so saving the same transcript again
+only adds a reference. Each new transcript is appended to the current segment
+file as its own gzip member; segments are never rewritten and roll over at
+SEGMENT_MAX_BYTES. An append-only index file maps (policy, call id) to the
+content hash and each hash to its (segment, offset, length), and is loaded
+into memory once, so reads are a dict lookup plus one seek.
+
+Several processes (the Flask app, the backend scripts) can share an archive:
+appends hold an exclusive flock on LOCK_FILE, and each process reads the
+index entries the others appended before it writes or reads.
+
+Layout:
+<TRANSCRIPT_ARCHIVE_DIR>/index.ndjson
+<TRANSCRIPT_ARCHIVE_DIR>/segment-00001.gz
+'''
+
+# Relative paths are resolved against this directory, not the working directory
+ARCHIVE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    os.environ.get('TRANSCRIPT_ARCHIVE_DIR', 'transcript_archive')
+)
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+INDEX_FILE = "index.ndjson"
+LOCK_FILE = ".lock"
+
+
+class TranscriptArchive:
+    def __init__(self, path=ARCHIVE_DIR):
+        self.path = path
+        self.lock = threading.Lock()
+        # hash -> (segment, offset, length)
+        self.blobs = {}
+        # (policy_number, call_id) -> (hash, saved_at)
+        self.refs = {}
+        self.segment = 1
+        # Bytes of the index file already loaded
+        self.index_offset = 0
+        os.makedirs(path, exist_ok=True)
+        self.lock_path = os.path.join(path, LOCK_FILE)
+        with self.lock, self._file_lock(fcntl.LOCK_SH):
+            self._load_index()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.path, f"segment-{segment:05d}.gz")
+
+    @contextmanager
+    def _file_lock(self, mode):
+        # Serializes appends across processes; self.lock covers threads
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        """
+        Load index entries appended since the last call, including ones
+        written by other processes. Call with both locks held.
+        """
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, "rb") as index:
+            index.seek(self.index_offset)
+            for line in index:
+                if not line.endswith(b"\n"):
+                    # Written without the lock (e.g. by an older version); read it next time
+                    break
+                self.index_offset += len(line)
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry["type"] == "blob":
+                    self.blobs[entry["hash"]] = (entry["segment"], entry["offset"], entry["length"])
+                    self.segment = max(self.segment, entry["segment"])
+                else:
+                    self.refs[(entry["policy_number"], entry["call_id"])] = (entry["hash"], entry["saved_at"])
+
+    def _append_index(self, entry):
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+        with open(os.path.join(self.path, INDEX_FILE), "ab") as index:
+            index.write(line)
+        self.index_offset += len(line)
+
+    def save(self, policy_number, call_id, transcript):
+        """
+        Store a transcript for a call.
+
+        Args:
+            policy_number (str): The policy the call belongs to
+            call_id (str): The Vapi call id
+            transcript (str): The transcript text
+
+        Returns:
+            tuple: (content hash, True if the content was already stored)
+        """
+        data = transcript.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        key = (str(policy_number), str(call_id))
+
+        with self.lock, self._file_lock(fcntl.LOCK_EX):
+            self._load_index()
+            duplicate = digest in self.blobs
+            if not duplicate:
+                compressed = gzip.compress(data)
+                segment_path = self._segment_path(self.segment)
+                if os.path.exists(segment_path) and os.path.getsize(segment_path) + len(compressed) > SEGMENT_MAX_BYTES:
+                    self.segment += 1
+                    segment_path = self._segment_path(self.segment)
+                with open(segment_path, "ab") as segment:
+                    offset = segment.tell()
+                    segment.write(compressed)
+                self.blobs[digest] = (self.segment, offset, len(compressed))
+                self._append_index({
+                    "type": "blob", "hash": digest,
+                    "segment": self.segment, "offset": offset, "length": len(compressed)
+                })
+
+            if self.refs.get(key, (None,))[0] != digest:
+                saved_at = datetime.now().isoformat()
+                self.refs[key] = (digest, saved_at)
+                self._append_index({
+                    "type": "ref", "policy_number": key[0], "call_id": key[1],
+                    "hash": digest, "saved_at": saved_at
+                })
+        return digest, duplicate
+
+    def _read_blob(self, digest):
+        segment, offset, length = self.blobs[digest]
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            return gzip.decompress(f.read(length)).decode("utf-8")
+
+    def load(self, policy_number, call_id=None):
+        """
+        Read a stored transcript.
+
+        Args:
+            policy_number (str): The policy the call belongs to
+            call_id (str, optional): The call; defaults to the most recently saved
+
+        Returns:
+            str: The transcript, or None if there is none
+        """
+        policy_number = str(policy_number)
+        with self.lock, self._file_lock(fcntl.LOCK_SH):
+            self._load_index()
+            if call_id is not None:
+                ref = self.refs.get((policy_number, str(call_id)))
+            else:
+                refs = [ref for (policy, _), ref in self.refs.items() if policy == policy_number]
+                ref = max(refs, key=lambda r: r[1]) if refs else None
+        if not ref:
+            return None
+        return self._read_blob(ref[0])
+
+    def calls(self, policy_number):
+        """
+        List the archived calls for a policy, newest first.
+
+        Returns:
+            list: {"call_id", "saved_at", "hash"} dicts
+        """
+        policy_number = str(policy_number)
+        with self.lock, self._file_lock(fcntl.LOCK_SH):
+            self._load_index()
+            entries = [
+                {"call_id": call_id, "saved_at": saved_at, "hash": digest}
+                for (policy, call_id), (digest, saved_at) in self.refs.items()
+                if policy == policy_number
+            ]
+        return sorted(entries, key=lambda e: e["saved_at"], reverse=True)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_archive():
+    """
+    Get the archive at TRANSCRIPT_ARCHIVE_DIR, opening it on first use.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = TranscriptArchive()
+    return _default
+
+
+def import_text_files(archive, pattern):
+    """
+    Import transcripts saved by the old save_transcript_to_file, which wrote
+    transcript_<policy>_<timestamp>.txt files with a short header.
+
+    Returns:
+        tuple: (files imported, files whose content was already stored)
+    """
+    imported = duplicates = 0
+    name = re.compile(r"transcript_(.+)_(\d{8}_\d{6})\.txt$")
+    for path in sorted(glob.glob(pattern)):
+        match = name.search(os.path.basename(path))
+        if not match:
+            continue
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        # Strip the header and the dashed lines around the transcript
+        body = text.split("-" * 50 + "\n", 1)[-1].rsplit("\n" + "-" * 50, 1)[0]
+        _, duplicate = archive.save(match.group(1), f"file-{match.group(2)}", body)
+        imported += 1
+        duplicates += duplicate
+    return imported, duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ready Set Insure - transcript archive')
+    parser.add_argument('--import-files', metavar='GLOB', help='Import old transcript_*.txt files')
+    parser.add_argument('--show', metavar='POLICY', help='Print the latest transcript for a policy')
+    args = parser.parse_args()
+
+    archive = default_archive()
+    if args.import_files:
+        imported, duplicates = import_text_files(archive, args.import_files)
+        print(f"Imported {imported} files, {duplicates} were duplicates")
+    elif args.show:
+        print(archive.load(args.show) or "No transcript archived for this policy")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
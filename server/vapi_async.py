@@ -0,0 +1,127 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+import httpx
+from pymongo import UpdateOne
+import vapi_client
+
+'''
+Async Vapi client for checking many calls at once.
+
+Requests share one httpx.AsyncClient connection pool and a semaphore caps
+how many are in flight, so checking N calls costs roughly the slowest round
+trip instead of the sum of all of them.
+
+Usage:
+import vapi_async
+statuses = vapi_async.refresh_statuses(call_ids, db=mongo.db)
+'''
+
+DEFAULT_CONCURRENCY = 20
+
+
+class AsyncVapiClient:
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY):
+        connect, read = vapi_client.TIMEOUTS['call.get']
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.client = httpx.AsyncClient(
+            base_url=vapi_client.BASE_URL,
+            headers={
+                'Authorization': f'Bearer {vapi_client.api_key()}',
+                'Content-Type': 'application/json',
+            },
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    async def get_call(self, call_id):
+        """
+        Fetch one call, retrying 429/5xx responses with jittered backoff.
+
+        Returns:
+            dict: The Vapi call object, or None if it could not be fetched
+        """
+        path = f'/call/{call_id}'
+        async with self.semaphore:
+            for attempt in range(vapi_client.MAX_RETRIES + 1):
+                start = time.perf_counter()
+                try:
+                    response = await self.client.get(path)
+                except httpx.TransportError as e:
+                    vapi_client.record_latency('call.get', (time.perf_counter() - start) * 1000)
+                    print(f"Vapi GET {path} failed: {str(e)}")
+                    response = None
+                else:
+                    vapi_client.record_latency('call.get', (time.perf_counter() - start) * 1000)
+                    if response.status_code == 200:
+                        return response.json()
+                    if response.status_code not in vapi_client.RETRY_STATUSES:
+                        print(f"Failed to get call {call_id}: {response.text}")
+                        return None
+                if attempt < vapi_client.MAX_RETRIES:
+                    await asyncio.sleep(random.uniform(0, min(
+                        vapi_client.BACKOFF_CAP, vapi_client.BACKOFF_BASE * 2 ** attempt)))
+            return None
+
+    async def get_calls(self, call_ids):
+        """
+        Fetch many calls concurrently.
+
+        Returns:
+            dict: call id -> Vapi call object (None for calls that failed)
+        """
+        call_ids = list(dict.fromkeys(call_ids))
+        calls = await asyncio.gather(*(self.get_call(call_id) for call_id in call_ids))
+        return dict(zip(call_ids, calls))
+
+
+def get_calls(call_ids, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Fetch many calls concurrently from synchronous code.
+
+    Args:
+        call_ids (list): Vapi call ids
+        concurrency (int): Maximum requests in flight
+
+    Returns:
+        dict: call id -> Vapi call object (None for calls that failed)
+    """
+    async def run():
+        async with AsyncVapiClient(concurrency) as client:
+            return await client.get_calls(call_ids)
+    return asyncio.run(run())
+
+
+def refresh_statuses(call_ids, db=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Get the current status of many calls and, if a database is given, write
+    them to call_records in a single bulk write.
+
+    Args:
+        call_ids (list): Vapi call ids
+        db: The Mongo database (mongo.db), optional
+        concurrency (int): Maximum requests in flight
+
+    Returns:
+        dict: call id -> status (None for calls that could not be fetched)
+    """
+    calls = get_calls(call_ids, concurrency)
+    statuses = {call_id: (call or {}).get('status') for call_id, call in calls.items()}
+
+    if db is not None:
+        checked = datetime.now().isoformat()
+        operations = [
+            UpdateOne({"call_id": call_id}, {"$set": {"status": status, "last_checked": checked}})
+            for call_id, status in statuses.items() if status
+        ]
+        if operations:
+            db.call_records.bulk_write(operations, ordered=False)
+
+    return statuses
@@ -0,0 +1,176 @@
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+'''
+Shared HTTP client for the Vapi API.
+
+All modules talk to Vapi through one pooled requests.Session so connections
+are kept alive between calls. Every request gets a (connect, read) timeout
+for its endpoint, 429/5xx responses are retried with jittered exponential
+backoff, and the latency of each request is printed and kept per endpoint.
+
+Usage:
+import vapi_client
+response = vapi_client.get('/call/123', endpoint='call.get')
+'''
+
+load_dotenv()
+
+BASE_URL = 'https://api.vapi.ai'
+POOL_SIZE = int(os.environ.get('VAPI_POOL_SIZE', 20))
+MAX_RETRIES = int(os.environ.get('VAPI_MAX_RETRIES', 3))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+# Longest Retry-After we honour, so a retried request stays well inside
+# the call job lease (call_jobs.LEASE_SECONDS)
+RETRY_AFTER_CAP = 30.0
+
+# (connect, read) timeouts in seconds per endpoint
+TIMEOUTS = {
+    'default': (3.05, 10),
+    'call.get': (3.05, 10),
+    'call.list': (3.05, 30),
+    'call.create': (3.05, 30),
+    'assistant': (3.05, 15),
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Methods that are safe to resend after the server may have seen them
+IDEMPOTENT_METHODS = {'GET', 'PUT', 'PATCH', 'DELETE'}
+
+_session = None
+_session_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def api_key():
+    return os.environ.get('VITE_VAPI_API_KEY') or os.environ.get('VAPI_API_KEY')
+
+
+def get_session():
+    """
+    Get the process-wide pooled session, creating it on first use.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({
+                    'Authorization': f'Bearer {api_key()}',
+                    'Content-Type': 'application/json',
+                })
+                _session = session
+    return _session
+
+
+def record_latency(endpoint, elapsed_ms):
+    with _stats_lock:
+        stats = _stats.setdefault(endpoint, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+
+def latency_stats():
+    """
+    Get request latency per endpoint.
+
+    Returns:
+        dict: endpoint -> {"count", "avg_ms", "max_ms"}
+    """
+    with _stats_lock:
+        return {
+            endpoint: {
+                "count": stats["count"],
+                "avg_ms": round(stats["total_ms"] / stats["count"], 1),
+                "max_ms": round(stats["max_ms"], 1)
+            }
+            for endpoint, stats in _stats.items()
+        }
+
+
+def _backoff(attempt, response=None):
+    if response is not None and response.headers.get('Retry-After', '').isdigit():
+        return min(float(response.headers['Retry-After']), RETRY_AFTER_CAP)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def request(method, path, endpoint='default', **kwargs):
+    """
+    Send a request to the Vapi API.
+
+    Args:
+        method (str): HTTP method
+        path (str): Path under the API root, e.g. '/call/phone'
+        endpoint (str): Key into TIMEOUTS, also used for latency stats
+        **kwargs: Passed through to requests (params, json, ...)
+
+    Returns:
+        requests.Response: The final response, after any retries
+
+    Raises:
+        requests.RequestException: If the request could not be sent
+    """
+    method = method.upper()
+    kwargs.setdefault('timeout', TIMEOUTS.get(endpoint, TIMEOUTS['default']))
+    url = path if path.startswith('http') else BASE_URL + path
+    session = get_session()
+
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            record_latency(endpoint, elapsed_ms)
+            # A connect failure never reached Vapi, so any method can be resent
+            retryable = method in IDEMPOTENT_METHODS or isinstance(e, requests.ConnectTimeout)
+            if not retryable or attempt >= MAX_RETRIES:
+                print(f"Vapi {method} {path} failed after {elapsed_ms:.0f}ms: {str(e)}")
+                raise
+            time.sleep(_backoff(attempt))
+            attempt += 1
+            continue
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        record_latency(endpoint, elapsed_ms)
+        print(f"Vapi {method} {path} {response.status_code} in {elapsed_ms:.0f}ms")
+
+        retryable = response.status_code == 429 or (
+            response.status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS)
+        if not retryable or attempt >= MAX_RETRIES:
+            return response
+        time.sleep(_backoff(attempt, response))
+        attempt += 1
+
+
+def get(path, endpoint='default', **kwargs):
+    return request('GET', path, endpoint, **kwargs)
+
+
+def post(path, endpoint='default', **kwargs):
+    return request('POST', path, endpoint, **kwargs)
+
+
+def patch(path, endpoint='default', **kwargs):
+    return request('PATCH', path, endpoint, **kwargs)
+
+
+def set_api_key(key):
+    """
+    Use a different API key for all following requests, e.g. one entered
+    at a prompt when the environment variable is missing.
+    """
+    os.environ['VITE_VAPI_API_KEY'] = key
+    get_session().headers['Authorization'] = f'Bearer {key}'
@@ -1,26 +1,12 @@
-import requests
 import os
 from dotenv import load_dotenv
-import vapi_get_call as vgC
+from policy_extract import extract_policy_number
+import vapi_client
 import json
 load_dotenv()
-# Your Vapi API Authorization token
-auth_token = os.environ['VITE_VAPI_API_KEY']
 # The Phone Number ID, and the Customer details for the call
 phone_number_id = os.environ['TWILIO_PHONE_ID']
 customer_number = "+18888963799"
-
-headers = {
-    'Authorization': f'Bearer {auth_token}',
-    'Content-Type': 'application/json',
-}
-
-# Your Vapi API Authorization token
-
-headers = {
-    'Authorization': f'Bearer {auth_token}',
-    'Content-Type': 'application/json',
-}
 # Create the data payload for the API request
 data = {
     'assistantId': os.environ['VITE_ASSISTANT_ID'],
@@ -30,121 +16,41 @@ data = {
     },
 }
 
-def get_last_call(id):
-    # Make the POST request to Vapi to create the phone call
-    response = requests.get(
-        f'https://api.vapi.ai/call', headers=headers, json=data)
+def list_calls():
+    """
+    Retrieve the full list of calls from the Vapi API.
+
+    Returns:
+        list: Raw Vapi call objects, or an empty list if the request failed
+    """
+    response = vapi_client.get('/call', endpoint='call.list')
 
     if response.status_code == 200:
-        print('assistant retrieved successfully')
-        res = response.json()
-        db_schema = '''
-        id
-    assistantId
-    phoneNumberId
-    type
-    startedAt
-    endedAt
-    transcript
-    recordingUrl
-    summary
-    createdAt
-    updatedAt
-    orgId
-    cost
-    customer
-    status
-    endedReason
-    messages
-    stereoRecordingUrl
-    costBreakdown
-    phoneCallProvider
-    phoneCallProviderId
-    phoneCallTransport
-    analysis
-    artifact
-    costs
-    monitor
-    transport
-    '''
-    
-        # return res[0]
-        
-        for i in res:
-            
-            policynum = vgC.extract_policy_number(i)
-            print(id,policynum,id==policynum)
-            
-            if policynum==id.strip():
-                print(id)
-                return json.dumps(i['analysis']['summary'].strip('\n'))
-                # break
-            # try:
-            #     print(i['transcript'])
-            # except:
-            #     pass
+        print('calls retrieved successfully')
+        return response.json()
     else:
-        print('Failed to create call')
+        print('Failed to retrieve calls')
         print(response.text)
-        return json.dumps("No records matching policy number found")
+        return []
 
-def get_chat_records(id):
-    # Make the POST request to Vapi to create the phone call
-    response = requests.get(
-        f'https://api.vapi.ai/call', headers=headers, json=data)
+def find_call(id, calls=None):
+    """
+    Find the first call whose extracted policy number matches `id`.
+    """
+    for i in (list_calls() if calls is None else calls):
+        policynum = extract_policy_number(i)
+        if policynum==id.strip():
+            return i
+    return None
 
-    if response.status_code == 200:
-        print('assistant retrieved successfully')
-        res = response.json()
-        db_schema = '''
-        id
-    assistantId
-    phoneNumberId
-    type
-    startedAt
-    endedAt
-    transcript
-    recordingUrl
-    summary
-    createdAt
-    updatedAt
-    orgId
-    cost
-    customer
-    status
-    endedReason
-    messages
-    stereoRecordingUrl
-    costBreakdown
-    phoneCallProvider
-    phoneCallProviderId
-    phoneCallTransport
-    analysis
-    artifact
-    costs
-    monitor
-    transport
-    '''
-    
-        # return res[0]
-        
-        for i in res:
-            
-            policynum = vgC.extract_policy_number(i)
-            print(id,policynum,id==policynum)
-            
-            if policynum==id.strip():
-                print(id)
-                return json.dumps(i['transcript'])
-                break
-                # break
-            # try:
-            #     print(i['transcript'])
-            # except:
-            #     pass
-    else:
-        print('Failed to create call')
-        print(response.text)
-        return json.dumps("No records matching policy number found")
-    
-# print((get_last_call('12345676')))
\ No newline at end of file
+def get_last_call(id):
+    call = find_call(id)
+    if call:
+        return json.dumps(call['analysis']['summary'].strip('\n'))
+    return json.dumps("No records matching policy number found")
+
+def get_chat_records(id):
+    call = find_call(id)
+    if call:
+        return json.dumps(call['transcript'])
+    return json.dumps("No records matching policy number found")
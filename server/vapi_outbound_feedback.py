@@ -2,17 +2,10 @@ from customer_outbound_calls import *
 
 # testing updating the bot
 load_dotenv()
-# Your Vapi API Authorization token
-auth_token = os.environ['VITE_VAPI_API_KEY']
 # The Phone Number ID, and the Customer details for the call
 phone_number_id = os.environ['TWILIO_PHONE_ID']
 customer_number = "+18888963799"
 
-headers = {
-    'Authorization': f'Bearer {auth_token}',
-    'Content-Type': 'application/json',
-}
-
 # Create the data payload for the API request
 data = {
     'assistantId': os.environ['VITE_ASSISTANT_ID'],
@@ -26,8 +19,7 @@ data = {
 
 def test_update():
     # getting the assistant
-    response = requests.get(
-        f'https://api.vapi.ai/assistant/{data['assistantId']}', headers=headers, json=data)
+    response = vapi_client.get(f"/assistant/{data['assistantId']}", endpoint='assistant')
 
     if response.status_code == 200:
         print('assistant retrieved successfully')
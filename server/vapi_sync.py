@@ -0,0 +1,214 @@
+import os
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+import call_store
+import vapi_client
+
+'''
+Incremental sync of the Vapi call list into the local call store.
+
+The first run backfills history by splitting the createdAt range into slices
+and paging through them in parallel. After that each run only asks Vapi for
+calls updated since the persisted high-water mark, so nothing is downloaded
+twice and gaps after downtime are picked up on the next run.
+
+Run:
+python vapi_sync.py --once
+python vapi_sync.py --interval 60
+'''
+
+load_dotenv()
+
+SYNC_STATE_ID = "vapi_calls"
+PAGE_SIZE = int(os.environ.get('VAPI_SYNC_PAGE_SIZE', 100))
+BACKFILL_DAYS = int(os.environ.get('VAPI_SYNC_BACKFILL_DAYS', 365))
+
+
+def to_iso(dt):
+    return dt.astimezone(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def from_iso(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def fetch_page(params):
+    """
+    Fetch one page of calls from the Vapi API.
+
+    Args:
+        params (dict): Query parameters for GET /call
+
+    Returns:
+        list: Raw Vapi call objects
+    """
+    response = vapi_client.get('/call', endpoint='call.list', params={'limit': PAGE_SIZE, **params})
+    if response.status_code != 200:
+        raise RuntimeError(f"Failed to list calls: {response.status_code} {response.text}")
+    return response.json()
+
+
+def sync_window(db, filters):
+    """
+    Page through every call matching `filters`, newest first. The cursor for
+    the next page is the createdAt of the oldest call on this page, inclusive
+    (createdAtLe), so calls sharing that timestamp across a page boundary are
+    not skipped; the calls already seen at the boundary are dropped from the
+    next page.
+
+    Args:
+        db: The Mongo database (mongo.db)
+        filters (dict): Extra query parameters, e.g. updatedAtGe / createdAtGe
+
+    Returns:
+        tuple: (number of calls stored, newest updatedAt seen or None)
+    """
+    stored = 0
+    newest = None
+    filters = dict(filters)
+    cursor = None
+    cursor_param = 'createdAtLe'
+    # Ids of the calls created at the cursor timestamp
+    boundary_ids = set()
+    while True:
+        params = dict(filters)
+        if cursor:
+            params.pop('createdAtLt', None)
+            params[cursor_param] = cursor
+        page = fetch_page(params)
+        calls = [call for call in page if call.get('id') not in boundary_ids]
+        if not calls and len(page) >= PAGE_SIZE and cursor_param == 'createdAtLe':
+            # A full page of calls all created at the cursor; step past it
+            print(f"{PAGE_SIZE} or more calls created at {cursor}; any beyond one page are skipped, "
+                  f"raise VAPI_SYNC_PAGE_SIZE")
+            cursor_param = 'createdAtLt'
+            boundary_ids = set()
+            continue
+        if not calls:
+            break
+
+        stored += call_store.upsert_calls(db, calls)
+        for call in calls:
+            if call.get('updatedAt') and (newest is None or call['updatedAt'] > newest):
+                newest = call['updatedAt']
+
+        if len(page) < PAGE_SIZE:
+            break
+        oldest = min(call['createdAt'] for call in page)
+        ids = {call.get('id') for call in page if call['createdAt'] == oldest}
+        boundary_ids = boundary_ids | ids if oldest == cursor else ids
+        cursor = oldest
+        cursor_param = 'createdAtLe'
+    return stored, newest
+
+
+def get_state(db):
+    return db.sync_state.find_one({"_id": SYNC_STATE_ID}) or {}
+
+
+def save_state(db, high_water_mark, stored):
+    db.sync_state.update_one(
+        {"_id": SYNC_STATE_ID},
+        {"$set": {
+            "high_water_mark": high_water_mark,
+            "last_run": to_iso(datetime.now(timezone.utc)),
+            "last_run_stored": stored
+        }},
+        upsert=True
+    )
+
+
+def backfill(db, workers=4):
+    """
+    Load the full call history by syncing createdAt slices in parallel.
+
+    Returns:
+        tuple: (number of calls stored, newest updatedAt seen or None)
+    """
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=BACKFILL_DAYS)
+    step = (end - start) / workers
+    windows = [
+        {'createdAtGe': to_iso(start + step * i), 'createdAtLt': to_iso(start + step * (i + 1))}
+        for i in range(workers)
+    ]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda window: sync_window(db, window), windows))
+
+    stored = sum(count for count, _ in results)
+    newest = max((mark for _, mark in results if mark), default=None)
+    return stored, newest
+
+
+def sync_once(db, workers=4):
+    """
+    Run one sync pass: a parallel backfill if there is no high-water mark yet,
+    otherwise an incremental pass over calls updated since the mark.
+
+    Returns:
+        dict: The stored count, the new high-water mark and the lag in seconds
+    """
+    state = get_state(db)
+    high_water_mark = state.get('high_water_mark')
+
+    if high_water_mark:
+        stored, newest = sync_window(db, {'updatedAtGe': high_water_mark})
+    else:
+        print("No sync state found, backfilling call history")
+        stored, newest = backfill(db, workers)
+
+    if newest and (not high_water_mark or newest > high_water_mark):
+        high_water_mark = newest
+    save_state(db, high_water_mark, stored)
+
+    lag = None
+    if high_water_mark:
+        lag = (datetime.now(timezone.utc) - from_iso(high_water_mark)).total_seconds()
+    return {"stored": stored, "high_water_mark": high_water_mark, "lag_seconds": lag}
+
+
+def get_lag(db):
+    """
+    Report how far behind the local call store is.
+
+    Returns:
+        dict: The high-water mark, the last run time and the lag in seconds
+    """
+    state = get_state(db)
+    lag = None
+    if state.get('high_water_mark'):
+        lag = (datetime.now(timezone.utc) - from_iso(state['high_water_mark'])).total_seconds()
+    return {
+        "high_water_mark": state.get('high_water_mark'),
+        "last_run": state.get('last_run'),
+        "lag_seconds": lag
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ready Set Insure - Vapi call sync')
+    parser.add_argument('--once', action='store_true', help='Run a single sync pass and exit')
+    parser.add_argument('--interval', type=int, default=60, help='Seconds between sync passes')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel pages during backfill')
+    args = parser.parse_args()
+
+    from main import mongo
+    call_store.ensure_indexes(mongo.db)
+
+    while True:
+        try:
+            result = sync_once(mongo.db, args.workers)
+            print(f"Synced {result['stored']} calls, high-water mark {result['high_water_mark']}, lag {result['lag_seconds']}s")
+        except Exception as e:
+            print(f"Error syncing calls: {str(e)}")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()